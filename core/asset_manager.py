@@ -0,0 +1,300 @@
+# project/core/asset_manager.py
+# 全域圖片快取：所有圖片載入（load_assets / 戰鬥精靈 / 對話立繪）都走這裡，
+# 以解碼後位元組數計算記憶體，超過預算時淘汰最久未使用的項目。
+# 場景範圍（scope）：在某場景中取得的圖片會被該場景釘住（參考計數），離開場景時釋放；
+# 沒有任何場景引用的項目直接丟棄，下次需要時再從精靈庫 / 磁碟快取讀回。
+from __future__ import annotations
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import pygame
+from core import asset_profiles, atlas, disk_cache
+from core.sprite_bank import bank_name, get_bank
+
+try:
+    from core.config import ASSET_MEMORY_BUDGET
+except Exception:
+    ASSET_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# 轉換模式（其餘見 core/asset_profiles.py）
+MODE_ALPHA = asset_profiles.ALPHA   # convert_alpha()
+MODE_RAW = "raw"                    # 不轉換（display 尚未建立時）
+
+Key = Tuple[Any, ...]
+
+NO_SCOPE = ""            # 不釘在任何場景（例如切圖用的整張 sheet）
+GLOBAL_SCOPE = "global"  # 整個遊戲期間都在用的圖（load_assets），不隨場景釋放
+
+def surface_bytes(surf: pygame.Surface) -> int:
+    """Surface 解碼後實際佔用的位元組數。"""
+    return surf.get_pitch() * surf.get_height()
+
+def _scale(img: pygame.Surface, size, smooth: bool) -> pygame.Surface:
+    if size and img.get_size() != size:
+        return (pygame.transform.smoothscale if smooth else pygame.transform.scale)(img, size)
+    return img
+
+def _convert(img: pygame.Surface, mode: str) -> pygame.Surface:
+    if mode == MODE_RAW or pygame.display.get_surface() is None:
+        return img
+    return img.convert_alpha()
+
+def _rule(path: str, mode: Optional[str]) -> Dict[str, Any]:
+    if mode is None:
+        return asset_profiles.profile_for(path)
+    return {"profile": mode}
+
+def _finish(img: Optional[pygame.Surface], rule: Dict[str, Any]) -> Optional[pygame.Surface]:
+    if img is None or rule["profile"] in (MODE_RAW, MODE_ALPHA):
+        return img
+    return asset_profiles.apply_profile(img, rule)
+
+class AssetManager:
+    def __init__(self, budget_bytes: int = ASSET_MEMORY_BUDGET):
+        self.budget_bytes = int(budget_bytes)
+        self._entries: "OrderedDict[Key, Tuple[pygame.Surface, int]]" = OrderedDict()
+        self._missing: set = set()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.scope: Optional[str] = None        # 目前場景；None 表示不追蹤
+        self._pins: Dict[Key, int] = {}         # key -> 引用它的場景數
+        self._scopes: Dict[str, set] = {}       # 場景 -> 已釘住的 key
+        self.preloader = None   # core.preload.AssetPreloader；有的話優先取背景解碼結果
+
+    # ---- 基本快取 ----
+    def cached(self, key: Key, factory: Callable[[], Optional[pygame.Surface]],
+               scope: Optional[str] = None) -> Optional[pygame.Surface]:
+        """以 key 取得 Surface；沒有就呼叫 factory() 產生並納入預算。factory 回傳 None 表示缺檔。
+        scope 省略時釘在目前場景。"""
+        scope = self.scope if scope is None else scope
+        ent = self._entries.get(key)
+        if ent is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._pin(key, scope)
+            return ent[0]
+        if key in self._missing:
+            self.hits += 1
+            return None
+        self.misses += 1
+        surf = factory()
+        if surf is None:
+            self._missing.add(key)
+            return None
+        self._pin(key, scope)
+        self._store(key, surf)
+        return surf
+
+    def _store(self, key: Key, surf: pygame.Surface) -> None:
+        size = surface_bytes(surf)
+        self._entries[key] = (surf, size)
+        self.bytes_used += size
+        self._evict()
+
+    def _evict(self) -> None:
+        # 預載器裡還沒被取用的解碼結果也算進預算；它們只是投機預取，超出時先丟
+        if self.preloader is not None:
+            self.preloader.trim(max(0, self.budget_bytes - self.bytes_used))
+        # 被場景釘住的不淘汰；至少保留最新放入的一項，避免單張大圖超預算時反覆載入
+        if self.bytes_used <= self.budget_bytes:
+            return
+        for key in list(self._entries)[:-1]:
+            if self.bytes_used <= self.budget_bytes:
+                break
+            if key in self._pins:
+                continue
+            _, size = self._entries.pop(key)
+            self.bytes_used -= size
+            self.evictions += 1
+
+    # ---- 場景範圍 ----
+    def _pin(self, key: Key, scope: Optional[str]) -> None:
+        if not scope:
+            return
+        keys = self._scopes.setdefault(scope, set())
+        if key not in keys:
+            keys.add(key)
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def enter_scope(self, name: Optional[str]) -> None:
+        """切換目前場景：釋放上一個場景的引用，之後取得的圖片釘在新場景。"""
+        if name == self.scope:
+            return
+        old, self.scope = self.scope, name
+        if old and old != GLOBAL_SCOPE:
+            self.release_scope(old)
+        self._evict()
+
+    def release_scope(self, name: str) -> int:
+        """放掉場景的所有引用；不再被任何場景引用的項目立即丟棄，回傳釋放的位元組數。"""
+        freed = 0
+        for key in self._scopes.pop(name, ()):
+            n = self._pins.get(key, 0) - 1
+            if n > 0:
+                self._pins[key] = n
+                continue
+            self._pins.pop(key, None)
+            ent = self._entries.pop(key, None)
+            if ent is not None:
+                self.bytes_used -= ent[1]
+                freed += ent[1]
+        return freed
+
+    def handle(self, scope: str) -> "AssetScope":
+        return AssetScope(self, scope)
+
+    # ---- 圖片載入 ----
+    # mode 為 None 時依 assets/asset_profiles.json 決定（opaque / colorkey / alpha / premultiplied）；
+    # 各層快取（預載、精靈庫、磁碟快取、圖集）一律產生 alpha 格式，最後才套用匯入設定。
+    def load(self, path, size: Optional[Tuple[int, int]] = None, *, skin: str = "default",
+             mode: Optional[str] = None, smooth: bool = True, scope: Optional[str] = None) -> Optional[pygame.Surface]:
+        """載入（並縮放）圖片；檔案不存在或解碼失敗回傳 None。"""
+        path = str(path)
+        size = tuple(size) if size else None
+        rule = _rule(path, mode)
+        key = (path, size, skin, rule["profile"], smooth)
+        return self.cached(key, lambda: _finish(self._decode(path, size, rule["profile"] == MODE_RAW, smooth), rule), scope)
+
+    def is_cached(self, path, size: Optional[Tuple[int, int]] = None, *, skin: str = "default",
+                  mode: Optional[str] = None, smooth: bool = True) -> bool:
+        """與 load() 同參數的圖片是否已在快取裡（不影響 LRU 順序與統計）。"""
+        path = str(path)
+        key = (path, tuple(size) if size else None, skin, _rule(path, mode)["profile"], smooth)
+        return key in self._entries
+
+    def load_region(self, path, rect: Tuple[int, int, int, int], size: Optional[Tuple[int, int]] = None, *,
+                    skin: str = "default", mode: Optional[str] = None, smooth: bool = True,
+                    scope: Optional[str] = None) -> Optional[pygame.Surface]:
+        """從整張圖（例如 tileset）切出 rect 區塊並縮放；整張圖本身也會被快取。"""
+        path = str(path)
+        size = tuple(size) if size else None
+        rect = tuple(rect)
+        rule = _rule(path, mode)
+        key = (path, size, skin, rule["profile"], smooth, rect)
+        raw = rule["profile"] == MODE_RAW
+        return self.cached(key, lambda: _finish(self._slice(path, rect, size, skin, raw, smooth), rule), scope)
+
+    def load_atlas(self, name: str, size: Optional[Tuple[int, int]] = None, *, skin: str = "default",
+                   mode: Optional[str] = None, smooth: bool = True, scope: Optional[str] = None) -> Optional[pygame.Surface]:
+        """以圖集名稱（例如 battle_r1_c0）取得子圖；沒有建圖集時回傳 None。"""
+        hit = atlas.lookup(name)
+        if hit is None:
+            return None
+        return self.load_region(hit[0], hit[1], size, skin=skin, mode=mode, smooth=smooth, scope=scope)
+
+    def _from_bank(self, path: str, size, smooth: bool, rect=None) -> Optional[pygame.Surface]:
+        """精靈庫（mmap）命中時零複製建立 Surface；格式不符顯示格式才轉換。"""
+        bank = get_bank()
+        if bank is None:
+            return None
+        name = bank_name(path, size, smooth, rect)
+        if name not in bank or bank.is_stale(path):
+            return None
+        img = bank.get(name)
+        if img is not None and not disk_cache.is_display_format(img):
+            img = _convert(img, MODE_ALPHA)
+        return img
+
+    def _slice(self, path: str, rect, size, skin: str, raw: bool, smooth: bool,
+               use_disk: bool = True) -> Optional[pygame.Surface]:
+        use_disk = use_disk and not raw
+        if use_disk:
+            img = self._from_bank(path, size, smooth, rect)
+            if img is not None:
+                return img
+        use_disk = use_disk and bool(size)
+        if use_disk:
+            img = disk_cache.load(path, size, smooth, rect)
+            if img is not None:
+                return img
+        sheet = self.load(path, skin=skin, mode=MODE_RAW if raw else MODE_ALPHA, scope=NO_SCOPE)
+        if sheet is None or not sheet.get_rect().contains(pygame.Rect(rect)):
+            return None
+        img = _scale(sheet.subsurface(rect).copy(), size, smooth)
+        if use_disk:
+            disk_cache.store(path, size, smooth, img, rect)
+        return img
+
+    def _decode(self, path: str, size, raw: bool, smooth: bool) -> Optional[pygame.Surface]:
+        mode = MODE_RAW if raw else MODE_ALPHA
+        # 1) 背景執行緒已解碼（並縮放）好的結果
+        img = self.preloader.take(path, size, smooth) if self.preloader is not None else None
+        if img is not None:
+            return img if disk_cache.is_display_format(img) else _convert(img, mode)
+        # 2) 精靈庫（mmap，按需分頁）
+        img = None if raw else self._from_bank(path, size, smooth)
+        if img is not None:
+            return img
+        # 3) 磁碟快取的縮放結果：不解碼、不縮放
+        use_disk = bool(size) and not raw
+        if use_disk:
+            img = disk_cache.load(path, size, smooth)
+            if img is not None:
+                return img
+        # 4) 已打包進圖集的散圖：改從圖集切出（整張圖集只解碼一次）
+        hit = atlas.lookup_path(path)
+        if hit is not None:
+            img = self._slice(hit[0], hit[1], size, "default", raw, smooth, use_disk=False)
+        # 5) 直接解碼散圖
+        if img is None:
+            if not os.path.exists(path):
+                return None
+            try:
+                img = _scale(_convert(pygame.image.load(path), mode), size, smooth)
+            except Exception:
+                return None
+        if use_disk:
+            disk_cache.store(path, size, smooth, img)
+        return img
+
+    # ---- 管理 ----
+    def set_budget(self, budget_bytes: int) -> None:
+        self.budget_bytes = int(budget_bytes)
+        self._evict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._missing.clear()
+        self._pins.clear()
+        self._scopes.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "pinned": len(self._pins),
+            "bytes": self.bytes_used,
+            "preloaded": self.preloader.unclaimed_bytes() if self.preloader is not None else 0,
+            "budget": self.budget_bytes,
+        }
+
+class AssetScope:
+    """綁定在某個場景上的載入介面；release() 放掉該場景持有的所有圖片。"""
+    def __init__(self, manager: AssetManager, name: str):
+        self.manager = manager
+        self.name = name
+
+    def load(self, path, size=None, **kw) -> Optional[pygame.Surface]:
+        return self.manager.load(path, size, scope=self.name, **kw)
+
+    def load_region(self, path, rect, size=None, **kw) -> Optional[pygame.Surface]:
+        return self.manager.load_region(path, rect, size, scope=self.name, **kw)
+
+    def load_atlas(self, name: str, size=None, **kw) -> Optional[pygame.Surface]:
+        return self.manager.load_atlas(name, size, scope=self.name, **kw)
+
+    def release(self) -> int:
+        return self.manager.release_scope(self.name)
+
+_MANAGER: Optional[AssetManager] = None
+
+def get_asset_manager() -> AssetManager:
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = AssetManager()
+    return _MANAGER
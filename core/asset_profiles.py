@@ -0,0 +1,91 @@
+# project/core/asset_profiles.py
+# 每個圖檔的匯入設定（assets/asset_profiles.json），依檔名或 glob 指定：
+#   opaque        -> convert()，不透明直接複製，最快；可用 "matte" 指定先鋪底色
+#   colorkey      -> convert() + set_colorkey(key, RLEACCEL)，適合只有全透明/全不透明的像素圖
+#   alpha         -> convert_alpha()（預設）
+#   premultiplied -> convert_alpha().premul_alpha()，blit 時需搭配 BLEND_PREMULTIPLIED
+from __future__ import annotations
+import fnmatch, json, os
+from typing import Any, Dict, List, Optional
+import pygame
+
+try:
+    from core.resource import proj_path, BASE_DIR
+except Exception:
+    from pathlib import Path
+    BASE_DIR = Path(__file__).resolve().parents[1]
+    def proj_path(*parts): return BASE_DIR.joinpath(*parts)
+
+PROFILE_PATH = proj_path("assets", "asset_profiles.json")
+
+OPAQUE = "opaque"
+COLORKEY = "colorkey"
+ALPHA = "alpha"
+PREMULTIPLIED = "premultiplied"
+PROFILES = (OPAQUE, COLORKEY, ALPHA, PREMULTIPLIED)
+
+DEFAULT_COLORKEY = (255, 0, 255)
+
+_RULES: Optional[List[Dict[str, Any]]] = None
+_DEFAULT = ALPHA
+_CACHE: Dict[str, Dict[str, Any]] = {}
+
+def _load_rules() -> List[Dict[str, Any]]:
+    global _RULES, _DEFAULT
+    if _RULES is not None:
+        return _RULES
+    _RULES = []
+    if PROFILE_PATH.exists():
+        try:
+            data = json.loads(PROFILE_PATH.read_text(encoding="utf-8"))
+            _DEFAULT = data.get("default", ALPHA)
+            _RULES = [r for r in data.get("profiles", []) if r.get("profile") in PROFILES]
+        except Exception as e:
+            print(f"讀取 asset_profiles.json 失敗: {e}")
+    return _RULES
+
+def profile_for(path) -> Dict[str, Any]:
+    """依相對專案根的路徑找出第一條符合的設定；沒有就用預設。"""
+    rel = os.path.relpath(os.path.abspath(str(path)), str(BASE_DIR)).replace(os.sep, "/")
+    hit = _CACHE.get(rel)
+    if hit is None:
+        hit = {"profile": _DEFAULT}
+        for rule in _load_rules():
+            if fnmatch.fnmatch(rel, rule.get("match", "")):
+                hit = rule
+                break
+        _CACHE[rel] = hit
+    return hit
+
+def apply_profile(img: pygame.Surface, rule: Dict[str, Any]) -> pygame.Surface:
+    """把（已 convert_alpha 的）圖片轉成設定指定的格式；display 未建立時原樣回傳。"""
+    if pygame.display.get_surface() is None:
+        return img
+    profile = rule.get("profile", ALPHA)
+    if profile == OPAQUE:
+        if "matte" in rule:
+            flat = pygame.Surface(img.get_size())
+            flat.fill(tuple(rule["matte"]))
+            flat.blit(img, (0, 0))
+            return flat.convert()
+        return img.convert()
+    if profile == COLORKEY:
+        key = tuple(rule.get("colorkey", DEFAULT_COLORKEY))
+        flat = pygame.Surface(img.get_size())
+        flat.fill(key)
+        flat.blit(img, (0, 0))
+        flat = flat.convert()
+        flat.set_colorkey(key, pygame.RLEACCEL)
+        return flat
+    if profile == PREMULTIPLIED:
+        return img.convert_alpha().premul_alpha()
+    return img
+
+def blit_flags(rule: Dict[str, Any]) -> int:
+    """該設定對應的 blit special_flags（只有 premultiplied 需要）。"""
+    return pygame.BLEND_PREMULTIPLIED if rule.get("profile") == PREMULTIPLIED else 0
+
+def reload() -> None:
+    global _RULES
+    _RULES = None
+    _CACHE.clear()
@@ -1,6 +1,7 @@
 import os, pygame
 from core.resource import proj_path
 from core.config import TILE, COLOR
+from core.asset_manager import get_asset_manager, GLOBAL_SCOPE
 
 ASSET_DIR = str(proj_path("assets","images"))
 
@@ -12,22 +13,25 @@ def _fallback(color, size):
 
 def load_image(name, fallback_color, size=(TILE, TILE)):
     path = os.path.join(ASSET_DIR, name)
-    if os.path.exists(path):
-        try:
-            img = pygame.image.load(path).convert_alpha()
-            if size: img = pygame.transform.smoothscale(img, size)
-            return img
-        except Exception:
-            pass
+    img = get_asset_manager().load(path, size, scope=GLOBAL_SCOPE)
+    if img is not None:
+        return img
     return _fallback(fallback_color, size)
 
+# key -> (檔名, 占位色, 尺寸)
+ASSET_TABLE = {
+    "player": ("player.png", COLOR["player"], (42,56)),
+    "tile_grass": ("tile_grass.png", COLOR["grass"], (TILE, TILE)),
+    "tile_wall": ("tile_wall.png", COLOR["wall"], (TILE, TILE)),
+    "door_purple": ("door_purple.png", COLOR["door"], (TILE, TILE)),
+    "npc_teacher": ("npc_teacher.png", COLOR["teacher"], (TILE, TILE)),
+    "npc_peer": ("npc_peer.png", COLOR["peer"], (TILE, TILE)),
+    "enemy_negation": ("enemy_negation.png", COLOR["enemy"], (200,200)),
+}
+
+def startup_image_requests():
+    """load_assets() 會用到的 (路徑, 尺寸)，供背景預載（磁碟快取命中時不解碼）。"""
+    return [(os.path.join(ASSET_DIR, name), size) for name, _, size in ASSET_TABLE.values()]
+
 def load_assets():
-    return {
-        "player": load_image("player.png", COLOR["player"], (42,56)),
-        "tile_grass": load_image("tile_grass.png", COLOR["grass"]),
-        "tile_wall": load_image("tile_wall.png", COLOR["wall"]),
-        "door_purple": load_image("door_purple.png", COLOR["door"]),
-        "npc_teacher": load_image("npc_teacher.png", COLOR["teacher"]),
-        "npc_peer": load_image("npc_peer.png", COLOR["peer"]),
-        "enemy_negation": load_image("enemy_negation.png", COLOR["enemy"], (200,200)),
-    }
+    return {key: load_image(name, color, size) for key, (name, color, size) in ASSET_TABLE.items()}
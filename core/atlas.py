@@ -0,0 +1,68 @@
+# project/core/atlas.py
+# 讀取 core/tools/build_atlas.py 產生的圖集（assets/atlas/），
+# 讓執行期以少數幾張大圖切出子圖，而不是逐一解碼散落的 PNG。
+from __future__ import annotations
+import json, os
+from typing import Dict, Optional, Tuple
+
+try:
+    from core.resource import proj_path, BASE_DIR
+except Exception:
+    from pathlib import Path
+    BASE_DIR = Path(__file__).resolve().parents[1]
+    def proj_path(*parts): return BASE_DIR.joinpath(*parts)
+
+ATLAS_DIR = proj_path("assets", "atlas")
+MANIFEST_PATH = ATLAS_DIR / "manifest.json"
+
+Rect = Tuple[int, int, int, int]
+
+# name -> (atlas png 絕對路徑, rect, atlas 建置時間)
+_INDEX: Optional[Dict[str, Tuple[str, Rect, float]]] = None
+
+def _load_index() -> Dict[str, Tuple[str, Rect, float]]:
+    global _INDEX
+    if _INDEX is not None:
+        return _INDEX
+    _INDEX = {}
+    if not MANIFEST_PATH.exists():
+        return _INDEX
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        built_at = MANIFEST_PATH.stat().st_mtime
+        for sheet in manifest.get("atlases", []):
+            image = str(ATLAS_DIR / sheet["image"])
+            tw, th = int(sheet["tile_w"]), int(sheet["tile_h"])
+            index = json.loads((ATLAS_DIR / sheet["index"]).read_text(encoding="utf-8"))
+            for name, (cx, cy) in index.items():
+                _INDEX[name] = (image, (cx * tw, cy * th, tw, th), built_at)
+    except Exception as e:
+        print(f"讀取圖集失敗: {e}")
+        _INDEX = {}
+    return _INDEX
+
+def atlas_name(path) -> str:
+    """散圖在圖集中的名稱：相對專案根的 posix 路徑，例如 assets/images/player.png。"""
+    rel = os.path.relpath(os.path.abspath(str(path)), str(BASE_DIR))
+    return rel.replace(os.sep, "/")
+
+def lookup(name: str) -> Optional[Tuple[str, Rect]]:
+    """以圖集名稱（散圖路徑或 prefix_rN_cM）查詢 (atlas png, rect)。"""
+    ent = _load_index().get(name)
+    return (ent[0], ent[1]) if ent else None
+
+def lookup_path(path) -> Optional[Tuple[str, Rect]]:
+    """以散圖路徑查詢；散圖比圖集新（尚未重建）時回傳 None，改讀散圖。"""
+    ent = _load_index().get(atlas_name(path))
+    if ent is None:
+        return None
+    try:
+        if os.path.getmtime(str(path)) > ent[2]:
+            return None
+    except OSError:
+        pass
+    return ent[0], ent[1]
+
+def reload() -> None:
+    global _INDEX
+    _INDEX = None
@@ -20,6 +20,13 @@ COLOR = {
 # Dialogue UI
 DIALOGUE_BOX_HEIGHT = 160
 DIALOGUE_PORTRAIT_SIZE = (96, 96)
+DIALOGUE_IDLE_WAIT_MS = 250   # 對話框閒置時 event.wait 的逾時（毫秒）
+
+# Asset cache
+ASSET_MEMORY_BUDGET = 64 * 1024 * 1024   # 解碼後圖片的記憶體上限（bytes）
+TEXT_CACHE_MAX_ENTRIES = 512            # 文字 Surface 快取上限（筆）
+TEXT_CACHE_MAX_BYTES = 8 * 1024 * 1024   # 文字 Surface 快取上限（bytes）
+GLYPH_ATLAS_SIZES = (16, 18, 20, 24)     # 預先渲染字形圖集的字級（core/tools/build_glyph_atlas.py）
 
 # Daily AP default
 ACTION_POINTS_PER_DAY = 3
@@ -1,13 +1,19 @@
 from __future__ import annotations
 import json, pygame
-from typing import Dict, Any
+from core.fonts import get_font
+from core.richtext import compile_markup, render_span
+from typing import Dict, Any, List
 
 try:
-    from core.ui import draw_text
+    from core.ui import draw_text, layout_text, ui_font
 except Exception:
     def draw_text(surface, txt, pos, color=(240,240,240), small=False):
-        font = pygame.font.SysFont(None, 20 if small else 24)
+        font = get_font("text", 20 if small else 24)
         surface.blit(font.render(str(txt), True, color), pos)
+    def layout_text(text, font, width):
+        return ((0, len(text)),)
+    def ui_font(small=False):
+        return get_font("text", 20 if small else 24)
 
 try:
     from core.config import COLOR, WIDTH, HEIGHT
@@ -19,9 +25,15 @@ try:
 except Exception:
     DIALOGUE_BOX_HEIGHT = 160
     DIALOGUE_PORTRAIT_SIZE = (96,96)
+try:
+    from core.config import DIALOGUE_IDLE_WAIT_MS
+except Exception:
+    DIALOGUE_IDLE_WAIT_MS = 250
 
 from core.resource import proj_path
-from core.skins import resolve_portrait_path
+from core.skins import find_portrait, get_current_skin, portrait_table
+from core.asset_manager import get_asset_manager
+from core.dialogue_bundle import read_dialogue
 DIALOGUE_FOLDER = proj_path("data","dialogues")
 
 _PORTRAIT_MAP_CACHE = None
@@ -47,100 +59,268 @@ def _resolve_portrait_name(speaker: str, portrait: str|None) -> str|None:
         return m[speaker]
     return speaker if speaker else None
 
+# 立繪路徑由 core.skins 的解析表查得；Surface 本身由 asset_manager 持有並受記憶體預算管理。
+_FALLBACK_CACHE: Dict[tuple, pygame.Surface] = {}
+
+def _fallback_portrait(speaker: str, size) -> pygame.Surface:
+    key = ((speaker or "NPC")[:1], bool(speaker), tuple(size))
+    surf = _FALLBACK_CACHE.get(key)
+    if surf is not None:
+        return surf
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    col = COLOR.get("hint",(200,200,120)) if speaker else (180,180,180)
+    pygame.draw.circle(surf, col, (size[0]//2, size[1]//2), min(size)//2)
+    pygame.draw.circle(surf, (0,0,0), (size[0]//2, size[1]//2), min(size)//2, 2)
+    try:
+        font = get_font("default", 28)
+        img = font.render(key[0], True, (30,30,30))
+        rect = img.get_rect(center=(size[0]//2, size[1]//2))
+        surf.blit(img, rect)
+    except Exception:
+        pass
+    _FALLBACK_CACHE[key] = surf
+    return surf
+
 def _load_portrait_surface(state: Dict[str, Any], speaker: str, portrait: str|None) -> pygame.Surface:
+    state = state or {}
     size = DIALOGUE_PORTRAIT_SIZE
     resolved = _resolve_portrait_name(speaker, portrait)
-    surf = None
-    if resolved:
-        path = resolve_portrait_path(state or {}, resolved)
-        if path.exists():
-            try:
-                img = pygame.image.load(str(path)).convert_alpha()
-                surf = pygame.transform.smoothscale(img, size)
-            except Exception:
-                surf = None
-    if surf is None:
-        surf = pygame.Surface(size, pygame.SRCALPHA)
-        col = COLOR.get("hint",(200,200,120)) if speaker else (180,180,180)
-        pygame.draw.circle(surf, col, (size[0]//2, size[1]//2), min(size)//2)
-        pygame.draw.circle(surf, (0,0,0), (size[0]//2, size[1]//2), min(size)//2, 2)
-        try:
-            ch = (speaker or "NPC")[:1]
-            font = pygame.font.SysFont(None, 28)
-            img = font.render(ch, True, (30,30,30))
-            rect = img.get_rect(center=(size[0]//2, size[1]//2))
-            surf.blit(img, rect)
-        except Exception:
-            pass
-    return surf
+    path = find_portrait(state, resolved) if resolved else None
+    surf = get_asset_manager().load(path, size, skin=get_current_skin(state)) if path else None
+    return surf if surf is not None else _fallback_portrait(speaker, size)
 
-def _load_dialogue_json(dialogue_id: str) -> Dict[str, Any]:
-    path = (DIALOGUE_FOLDER / f"{dialogue_id}.json")
-    data = json.loads(path.read_text(encoding="utf-8"))
-    lines = data.get("lines", [])
+def prewarm_portraits(state: Dict[str, Any], lines: List[Dict[str, Any]]) -> List[pygame.Surface]:
+    """對話開始前一次載入所有行的立繪；回傳與 lines 對齊的 Surface 清單。"""
+    state = state or {}
+    portrait_table(get_current_skin(state))   # 立繪目錄有變動時重建解析表
+    return [_load_portrait_surface(state, ln.get("speaker",""), ln.get("portrait")) for ln in lines]
+
+# 對話來源，依序查：記憶體登錄（程式產生的對話）-> 對話包 / 散檔
+# 已解碼（並編譯標記）的對話：id -> {"id", "lines"}；第一次用到時才讀取
+_DIALOGUE_CACHE: Dict[str, Dict[str, Any]] = {}
+_MEMORY_SOURCES: Dict[str, Dict[str, Any]] = {}
+
+def _normalize(data: Dict[str, Any], dialogue_id: str) -> Dict[str, Any]:
     norm = []
-    for ln in lines:
+    for ln in data.get("lines", []):
         if isinstance(ln, str):
             norm.append({"speaker":"", "text":ln})
-        else:
+        elif isinstance(ln, dict):
             norm.append({"speaker":ln.get("speaker",""), "text":ln.get("text",""), "portrait":ln.get("portrait"), "side":ln.get("side","left")})
+    # 行內標記在載入時編譯一次；text 換成去掉標記的純文字
+    for rec in norm:
+        rec["rich"] = compile_markup(rec["text"])
+        rec["text"] = rec["rich"].plain
     return {"id": data.get("id", dialogue_id), "lines": norm}
 
-def run_dialogue(screen: pygame.Surface, dialogue_id: str, *, state: Dict[str, Any]=None, box_height:int=None, margin:int=24) -> None:
+def register_dialogue(dialogue_id: str, lines: list) -> None:
+    """在記憶體登錄一段對話，之後 run_dialogue(dialogue_id) 不需要任何檔案。"""
+    _MEMORY_SOURCES[dialogue_id] = {"id": dialogue_id, "lines": list(lines)}
+    _DIALOGUE_CACHE.pop(dialogue_id, None)
+
+def unregister_dialogue(dialogue_id: str) -> None:
+    _MEMORY_SOURCES.pop(dialogue_id, None)
+    _DIALOGUE_CACHE.pop(dialogue_id, None)
+
+def _load_dialogue_json(dialogue_id: str) -> Dict[str, Any]:
+    cached = _DIALOGUE_CACHE.get(dialogue_id)
+    if cached is not None:
+        return cached
+    data = _MEMORY_SOURCES.get(dialogue_id)
+    if data is None:
+        data = read_dialogue(dialogue_id)
+    result = _DIALOGUE_CACHE[dialogue_id] = _normalize(data, dialogue_id)
+    return result
+
+def clear_dialogue_cache() -> None:
+    _DIALOGUE_CACHE.clear()
+
+def portrait_requests(dialogue_id: str, skin: str = "default") -> List[tuple]:
+    """解碼對話進快取，回傳它還沒載入的立繪預載請求 (路徑, 尺寸)。
+    只查表與讀檔，不建立 Surface，可在背景執行緒呼叫。"""
     data = _load_dialogue_json(dialogue_id)
-    lines = data["lines"]
-    clock = pygame.time.Clock()
-    if box_height is None: box_height = DIALOGUE_BOX_HEIGHT
-    idx = 0; running = True
-    box_rect = pygame.Rect(0, HEIGHT - box_height, WIDTH, box_height)
-    name_color = COLOR.get("hint",(200,200,120))
-    text_color = COLOR.get("text",(240,240,240))
-    panel_color = COLOR.get("panel",(32,32,36))
-    border_color = (0,0,0)
-
-    while running:
-        pygame.draw.rect(screen, panel_color, box_rect)
-        pygame.draw.rect(screen, border_color, box_rect, 2)
-        if 0 <= idx < len(lines):
-            rec = lines[idx]
-            speaker = rec.get("speaker",""); text = rec.get("text","")
-            portrait_key = rec.get("portrait"); side = rec.get("side","left").lower()
-            portrait = _load_portrait_surface(state or {}, speaker, portrait_key)
-            px, py = (box_rect.x + margin, box_rect.y + margin)
-            if side == "right":
-                px = box_rect.right - margin - portrait.get_width()
-            screen.blit(portrait, (px, py))
+    state = {"skin": skin}
+    manager = get_asset_manager()
+    out = []
+    for ln in data["lines"]:
+        name = _resolve_portrait_name(ln.get("speaker",""), ln.get("portrait"))
+        path = find_portrait(state, name) if name else None
+        if path is None:
+            continue
+        req = (str(path), DIALOGUE_PORTRAIT_SIZE)
+        if req not in out and not manager.is_cached(path, DIALOGUE_PORTRAIT_SIZE, skin=skin):
+            out.append(req)
+    return out
+
+class DialoguePlayer:
+    """非阻塞對話框：由宿主場景在自己的主迴圈裡呼叫 handle_event / update(dt) / draw(surface)，
+    場景本身的繪製與動畫照常進行。done 變成 True 表示對話結束。"""
+    def __init__(self, data: Dict[str, Any], *, state: Dict[str, Any]=None, box_height:int=None, margin:int=24,
+                 text_speed: float=None):
+        self.lines = data["lines"]
+        self.state = state or {}
+        self.portraits = prewarm_portraits(self.state, self.lines)
+        self.margin = margin
+        self.box_rect = pygame.Rect(0, HEIGHT - (box_height or DIALOGUE_BOX_HEIGHT), WIDTH, box_height or DIALOGUE_BOX_HEIGHT)
+        self.text_speed = text_speed   # 字/秒；None 表示整行直接顯示
+        self.idx = 0
+        self.timer = 0.0
+        self.done = not self.lines
+        self._layouts: Dict[int, tuple] = {}       # idx -> (text_x, text_y, 各行 span)
+        self._line_surfs: Dict[tuple, pygame.Surface] = {}   # (idx, 行號) -> 已完整顯示的行
+        self._partial = None                       # (idx, 行號, 字數, Surface)
+        self._drawn = None                         # 上次 draw 時的 (idx, 顯示字數)
+
+    @classmethod
+    def from_id(cls, dialogue_id: str, **kw) -> "DialoguePlayer":
+        return cls(_load_dialogue_json(dialogue_id), **kw)
+
+    @classmethod
+    def from_lines(cls, lines: list, **kw) -> "DialoguePlayer":
+        return cls(_normalize({"lines": lines}, "inline"), **kw)
+
+    def seek(self, idx: int) -> None:
+        """從第 idx 行開始播（讀檔續播用）；超過行數視為已結束。"""
+        self.idx = max(0, int(idx))
+        self.timer = 0.0
+        self.done = self.idx >= len(self.lines)
+        if self.done:
+            self.idx = max(0, len(self.lines) - 1)
+
+    def _visible_chars(self) -> int:
+        rich = self.lines[self.idx]["rich"]
+        if self.text_speed is None:
+            return len(rich.plain)
+        return rich.chars_at(self.timer, self.text_speed)
+
+    def advance(self) -> None:
+        """打字中先顯示整行，否則換下一行。"""
+        if self._visible_chars() < len(self.lines[self.idx]["rich"].plain):
+            self.timer = float("inf")
+            return
+        self.idx += 1
+        self.timer = 0.0
+        if self.idx >= len(self.lines):
+            self.done = True
+
+    def handle_event(self, event) -> bool:
+        """處理一個事件；回傳 True 表示事件已被對話框吃掉。QUIT 會結束對話但仍交給宿主處理。"""
+        if self.done:
+            return False
+        if event.type == pygame.QUIT:
+            self.done = True
+            return False
+        if event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_RETURN, pygame.K_SPACE, pygame.K_KP_ENTER):
+                self.advance(); return True
+            if event.key == pygame.K_ESCAPE:
+                self.done = True; return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.advance(); return True
+        return False
+
+    def update(self, dt: float) -> bool:
+        if not self.done and self.text_speed is not None:
+            self.timer += dt
+        return self.done
+
+    def animating(self) -> bool:
+        """打字機還在跑（需要持續 update）。"""
+        return not self.done and self._visible_chars() < len(self.lines[self.idx]["rich"].plain)
+
+    def needs_redraw(self) -> bool:
+        """內容（目前行、顯示字數）自上次 draw 之後有沒有變。"""
+        return self._state_key() != self._drawn
+
+    def invalidate(self) -> None:
+        self._drawn = None
+
+    def _state_key(self) -> tuple:
+        return (self.idx, None if self.done else self._visible_chars())
+
+    def _layout(self, idx: int) -> tuple:
+        lay = self._layouts.get(idx)
+        if lay is None:
+            rec = self.lines[idx]
+            box_rect, margin = self.box_rect, self.margin
+            side = rec.get("side","left").lower()
+            portrait = self.portraits[idx]
             text_x = box_rect.x + margin
             if side == "left":
                 text_x += portrait.get_width() + 16
-            name_y = box_rect.y + margin
-            text_y = name_y + 28 if speaker else name_y
-            if speaker: draw_text(screen, f"{speaker}", (text_x, name_y), color=name_color)
-            draw_text(screen, text, (text_x, text_y), color=text_color)
-
-        pygame.display.flip()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False; break
-            if event.type == pygame.KEYDOWN:
-                if event.key in (pygame.K_RETURN, pygame.K_SPACE, pygame.K_KP_ENTER):
-                    idx += 1
-                    if idx >= len(lines): running = False; break
-                elif event.key == pygame.K_ESCAPE:
-                    running = False; break
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                idx += 1
-                if idx >= len(lines): running = False; break
-        clock.tick(60)
+            text_right = box_rect.right - margin - portrait.get_width() - 16 if side == "right" else box_rect.right - margin
+            text_y = box_rect.y + margin + (28 if rec.get("speaker") else 0)
+            lay = self._layouts[idx] = (text_x, text_y, layout_text(rec["rich"].plain, ui_font(), text_right - text_x))
+        return lay
+
+    def draw(self, surface: pygame.Surface) -> None:
+        self._drawn = self._state_key()
+        box_rect, margin = self.box_rect, self.margin
+        pygame.draw.rect(surface, COLOR.get("panel",(32,32,36)), box_rect)
+        pygame.draw.rect(surface, (0,0,0), box_rect, 2)
+        if self.done:
+            return
+        idx = self.idx
+        rec = self.lines[idx]
+        speaker = rec.get("speaker","")
+        portrait = self.portraits[idx]
+        px, py = (box_rect.x + margin, box_rect.y + margin)
+        if rec.get("side","left").lower() == "right":
+            px = box_rect.right - margin - portrait.get_width()
+        surface.blit(portrait, (px, py))
+        text_x, text_y, spans = self._layout(idx)
+        if speaker: draw_text(surface, f"{speaker}", (text_x, box_rect.y + margin), color=COLOR.get("hint",(200,200,120)))
+        font = ui_font()
+        text_color = COLOR.get("text",(240,240,240))
+        rich = rec["rich"]
+        shown = self._visible_chars()
+        for n, (a, b) in enumerate(spans):
+            if shown <= a:
+                break
+            if shown >= b:
+                surf = self._line_surfs.get((idx, n))
+                if surf is None:
+                    surf = self._line_surfs[(idx, n)] = render_span(font, rich, a, b, text_color)
+            else:
+                # 打字中的最後一行：字數變了才重畫
+                if self._partial is None or self._partial[:3] != (idx, n, shown):
+                    self._partial = (idx, n, shown, render_span(font, rich, a, shown, text_color))
+                surf = self._partial[3]
+            surface.blit(surf, (text_x, text_y))
+            text_y += font.get_linesize()
+
+_EXPOSE_EVENTS = {getattr(pygame, name) for name in ("VIDEOEXPOSE", "WINDOWEXPOSED", "WINDOWRESTORED") if hasattr(pygame, name)}
+
+def _run_blocking(screen: pygame.Surface, player: DialoguePlayer) -> None:
+    """舊介面相容：在自己的迴圈裡播放到結束。
+    只在內容改變時重畫對話框並只更新該區域；閒置時以 event.wait 睡眠，不空轉。"""
+    clock = pygame.time.Clock()
+    full = True   # 第一幀（以及視窗重新露出時）整個畫面 flip，讓 HUD 等一起上屏
+    while not player.done:
+        if full or player.needs_redraw():
+            player.draw(screen)
+            if full:
+                pygame.display.flip()
+                full = False
+            else:
+                pygame.display.update(player.box_rect)
+        if player.animating():
+            events = pygame.event.get()
+            dt = clock.tick(60) / 1000.0
+        else:
+            first = pygame.event.wait(DIALOGUE_IDLE_WAIT_MS)
+            events = ([first] if first.type != pygame.NOEVENT else []) + pygame.event.get()
+            dt = 0.0
+            clock.tick()
+        for event in events:
+            if event.type in _EXPOSE_EVENTS:
+                full = True
+            player.handle_event(event)
+        player.update(dt)
+
+def run_dialogue(screen: pygame.Surface, dialogue_id: str, *, state: Dict[str, Any]=None, box_height:int=None, margin:int=24) -> None:
+    _run_blocking(screen, DialoguePlayer.from_id(dialogue_id, state=state, box_height=box_height, margin=margin))
 
 def run_lines(screen: pygame.Surface, lines: list, *, state: Dict[str, Any]=None, box_height:int=None, margin:int=24) -> None:
-    data = {"id":"inline","lines":[]}
-    for ln in lines:
-        if isinstance(ln, str):
-            data["lines"].append({"speaker":"", "text":ln})
-        elif isinstance(ln, dict):
-            data["lines"].append({"speaker":ln.get("speaker",""), "text":ln.get("text",""), "portrait":ln.get("portrait"), "side":ln.get("side","left")})
-    path = proj_path("data","dialogues","_inline_temp.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    run_dialogue(screen, "_inline_temp", state=state, box_height=box_height, margin=margin)
+    """直接播放一串台詞（系統訊息、占位對話等），不經過任何檔案。"""
+    _run_blocking(screen, DialoguePlayer.from_lines(lines, state=state, box_height=box_height, margin=margin))
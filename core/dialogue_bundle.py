@@ -0,0 +1,108 @@
+# project/core/dialogue_bundle.py
+# 對話包（data/dialogues.bundle，由 core/tools/build_dialogue_bundle.py 產生）：
+# 所有 data/dialogues/*.json 壓成一個檔案，檔頭是 id -> (offset, length) 索引，
+# 執行期以 mmap 開啟，只有被讀到的那一筆才做 JSON 解碼。
+# 開發時 data/dialogues/<id>.json 仍然有效；比對話包新（或對話包沒有）時以散檔為準。
+#
+# 檔案格式（little-endian）：
+#   header : magic "DLGBNDL1" | u32 count
+#   entry  : u16 id_len | id (utf-8) | u64 offset | u32 length
+#   data   : 各 entry 的 UTF-8 JSON
+from __future__ import annotations
+import json, mmap, os, struct
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    from core.resource import proj_path
+except Exception:
+    from pathlib import Path
+    def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
+
+DIALOGUE_DIR = proj_path("data", "dialogues")
+BUNDLE_PATH = proj_path("data", "dialogues.bundle")
+
+_MAGIC = b"DLGBNDL1"
+_HEAD = struct.Struct("<8sI")
+_ID_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<QI")
+
+class DialogueBundle:
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.built_at = os.path.getmtime(self.path)
+        self.index: Dict[str, Tuple[int, int]] = self._read_index()
+
+    def _read_index(self) -> Dict[str, Tuple[int, int]]:
+        magic, count = _HEAD.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"不是對話包檔案: {self.path}")
+        pos = _HEAD.size
+        index = {}
+        for _ in range(count):
+            (n,) = _ID_LEN.unpack_from(self._mm, pos); pos += _ID_LEN.size
+            did = bytes(self._mm[pos:pos + n]).decode("utf-8"); pos += n
+            index[did] = _ENTRY.unpack_from(self._mm, pos); pos += _ENTRY.size
+        return index
+
+    def __contains__(self, dialogue_id: str) -> bool:
+        return dialogue_id in self.index
+
+    def get(self, dialogue_id: str) -> Optional[Dict[str, Any]]:
+        ent = self.index.get(dialogue_id)
+        if ent is None:
+            return None
+        offset, length = ent
+        return json.loads(self._mm[offset:offset + length].decode("utf-8"))
+
+def write_bundle(path, dialogues: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """把 (id, JSON 物件) 寫成對話包，回傳筆數。"""
+    items = [(did.encode("utf-8"), json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+             for did, data in dialogues]
+    offset = _HEAD.size + sum(_ID_LEN.size + len(did) + _ENTRY.size for did, _ in items)
+    tmp = str(path) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEAD.pack(_MAGIC, len(items)))
+        for did, blob in items:
+            f.write(_ID_LEN.pack(len(did))); f.write(did)
+            f.write(_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for _, blob in items:
+            f.write(blob)
+    os.replace(tmp, str(path))
+    return len(items)
+
+_BUNDLE: Optional[DialogueBundle] = None
+_BUNDLE_CHECKED = False
+
+def get_bundle() -> Optional[DialogueBundle]:
+    """開啟預設對話包；沒有建置時回傳 None。"""
+    global _BUNDLE, _BUNDLE_CHECKED
+    if not _BUNDLE_CHECKED:
+        _BUNDLE_CHECKED = True
+        if BUNDLE_PATH.exists():
+            try:
+                _BUNDLE = DialogueBundle(BUNDLE_PATH)
+            except Exception as e:
+                print(f"讀取對話包失敗: {e}")
+                _BUNDLE = None
+    return _BUNDLE
+
+def has_dialogue(dialogue_id: str) -> bool:
+    bundle = get_bundle()
+    return (bundle is not None and dialogue_id in bundle) or (DIALOGUE_DIR / f"{dialogue_id}.json").exists()
+
+def read_dialogue(dialogue_id: str) -> Dict[str, Any]:
+    """讀出一筆對話的原始 JSON；散檔比對話包新（或對話包沒有這筆）時讀散檔。
+    兩邊都沒有時丟出 FileNotFoundError。"""
+    loose = DIALOGUE_DIR / f"{dialogue_id}.json"
+    bundle = get_bundle()
+    if bundle is not None and dialogue_id in bundle:
+        try:
+            newer = os.path.getmtime(loose) > bundle.built_at
+        except OSError:
+            newer = False
+        if not newer:
+            return bundle.get(dialogue_id)
+    return json.loads(loose.read_text(encoding="utf-8"))
@@ -0,0 +1,88 @@
+# project/core/disk_cache.py
+# 縮放後精靈的磁碟快取：存顯示格式的原始像素，下次啟動以 frombuffer 直接讀回，
+# 不再做 PNG 解碼與 smoothscale。鍵值含來源檔 mtime / 檔案大小 / 目標尺寸，來源一改就自然失效。
+from __future__ import annotations
+import hashlib, os, struct
+from pathlib import Path
+from typing import Optional, Tuple
+import pygame
+
+try:
+    from core.resource import proj_path, ensure_dir
+except Exception:
+    def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
+    def ensure_dir(p: Path): p.mkdir(parents=True, exist_ok=True); return p
+
+CACHE_DIR = proj_path("data", "cache", "sprites")
+
+_MAGIC = b"SPRC"
+_HEADER = struct.Struct("<4sHH4s")   # magic, w, h, pixel format
+
+Raw = Tuple[bytes, Tuple[int, int], str]
+
+_DISPLAY_FMT: Optional[str] = None
+
+def display_format() -> str:
+    """convert_alpha() 後 Surface 的位元組排列（"BGRA" 或 "RGBA"）；須在主執行緒呼叫。"""
+    global _DISPLAY_FMT
+    if _DISPLAY_FMT is None:
+        fmt = "RGBA"
+        if pygame.display.get_surface() is not None:
+            probe = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+            if probe.get_masks()[0] == 0x00FF0000:
+                fmt = "BGRA"
+        _DISPLAY_FMT = fmt
+    return _DISPLAY_FMT
+
+def entry_path(path, size, smooth: bool = True, rect=None) -> Optional[Path]:
+    try:
+        st = os.stat(str(path))
+    except OSError:
+        return None
+    ident = f"{os.path.abspath(str(path))}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}|{int(smooth)}|{rect}"
+    return CACHE_DIR / (hashlib.sha1(ident.encode("utf-8")).hexdigest() + ".spr")
+
+def read_raw(path, size, smooth: bool = True, rect=None) -> Optional[Raw]:
+    """讀出快取的原始像素（可在工作執行緒呼叫）。"""
+    p = entry_path(path, size, smooth, rect)
+    if p is None or not p.exists():
+        return None
+    try:
+        blob = p.read_bytes()
+        magic, w, h, fmt = _HEADER.unpack_from(blob)
+        data = blob[_HEADER.size:]
+        if magic != _MAGIC or len(data) != w * h * 4:
+            return None
+        return data, (w, h), fmt.decode("ascii")
+    except Exception:
+        return None
+
+def write_raw(path, size, smooth: bool, rect, data: bytes, dims: Tuple[int, int], fmt: str) -> None:
+    p = entry_path(path, size, smooth, rect)
+    if p is None:
+        return
+    try:
+        ensure_dir(CACHE_DIR)
+        tmp = p.with_suffix(".tmp%d" % os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, dims[0], dims[1], fmt.encode("ascii")))
+            f.write(data)
+        os.replace(tmp, p)
+    except Exception:
+        pass
+
+def surface_from_raw(raw: Raw) -> pygame.Surface:
+    data, dims, fmt = raw
+    return pygame.image.frombuffer(data, dims, fmt)
+
+def is_display_format(surf: pygame.Surface) -> bool:
+    return (surf.get_flags() & pygame.SRCALPHA) != 0 and surf.get_bitsize() == 32 and \
+        surf.get_masks()[0] == (0x00FF0000 if display_format() == "BGRA" else 0x000000FF)
+
+def load(path, size, smooth: bool = True, rect=None) -> Optional[pygame.Surface]:
+    raw = read_raw(path, size, smooth, rect)
+    return surface_from_raw(raw) if raw else None
+
+def store(path, size, smooth: bool, surf: pygame.Surface, rect=None) -> None:
+    fmt = display_format()
+    write_raw(path, size, smooth, rect, pygame.image.tobytes(surf, fmt), surf.get_size(), fmt)
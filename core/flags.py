@@ -0,0 +1,226 @@
+# project/core/flags.py
+# 旗標登錄表與位元集旗標存放：
+#   data/flags.json 記錄旗標名稱的順序，名稱在清單中的位置就是它的整數 id。
+#   這個檔案只在開發時手動（只在尾端）追加，執行期唯讀；遊戲中才出現的新名稱只在記憶體裡登錄，
+#   排在檔案的名稱之後，並隨存檔一起寫出（見 FlagStore.pack），讀檔時再依名稱對回來。
+# FlagStore 取代 state["flags"] 的 dict：布林旗標放在整數位元集，計數器放在依 id 排的陣列，
+# 其他值（例如 story_last 這種字串）另存；對外提供與 dict 相同的介面，舊程式不必改寫。
+# 存檔時壓成 {"bits", "off", "counters", "other", "base", "extra"}（見 pack）。
+from __future__ import annotations
+import json
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from core.resource import proj_path
+except Exception:
+    from pathlib import Path
+    def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
+
+REGISTRY_PATH = proj_path("data", "flags.json")
+
+class FlagRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        try:
+            for name in json.loads(path.read_text(encoding="utf-8")).get("flags", []):
+                if name not in self.ids:
+                    self.ids[name] = len(self.names)
+                    self.names.append(name)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"讀取旗標登錄表失敗: {e}")
+        self.base = len(self.names)   # 來自 data/flags.json 的名稱數；之後的是執行期登錄的
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def id(self, name: str) -> int:
+        """旗標名稱的 id；第一次見到的名稱登錄在尾端（只在記憶體）。"""
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def name(self, i: int) -> str:
+        return self.names[i]
+
+    @property
+    def extra(self) -> List[str]:
+        """執行期登錄、不在 data/flags.json 裡的名稱（依 id 排序）。"""
+        return self.names[self.base:]
+
+_REGISTRY: Optional[FlagRegistry] = None
+
+def get_registry() -> FlagRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = FlagRegistry()
+    return _REGISTRY
+
+def flag_id(name: str) -> int:
+    return get_registry().id(name)
+
+def flag_mask(names) -> int:
+    """一組旗標名稱的位元遮罩。"""
+    mask = 0
+    for name in names or ():
+        mask |= 1 << flag_id(name)
+    return mask
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    i = 0
+    while mask >> i:
+        if mask >> i & 1:
+            yield i
+        i += 1
+
+class FlagStore(MutableMapping):
+    """state["flags"] 的位元集實作，行為與 dict 相同（包括存 False、存 0）。
+    truthy 是「值為真」的旗標位元集（True、非零計數器、非空的其他值），
+    劇情條件 require_flags / forbid_flags 以它判定，與舊版 dict 的 flags.get(f) 真假一致。"""
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, registry: Optional[FlagRegistry] = None):
+        self.registry = registry or get_registry()
+        self.bits = 0                       # 值為 True 的布林旗標
+        self.off = 0                        # 值為 False 的布林旗標（鍵存在但為假）
+        self.counted = 0                    # 哪些 id 有計數器
+        self.counters = array("q")          # 依 id 排的計數器值
+        self.other: Dict[str, Any] = {}     # 非布林、非整數的值
+        self.truthy = 0                     # 值為真的旗標（不論型別）
+        if initial:
+            self.update(initial)
+
+    # ---- 位元操作 ----
+    def test(self, i: int) -> bool:
+        return bool(self.truthy >> i & 1)
+
+    def test_mask(self, require: int = 0, forbid: int = 0) -> bool:
+        return (self.truthy & require) == require and not (self.truthy & forbid)
+
+    def _drop(self, name: str, i: int) -> None:
+        keep = ~(1 << i)
+        self.bits &= keep
+        self.off &= keep
+        self.counted &= keep
+        self.truthy &= keep
+        self.other.pop(name, None)
+
+    def _set_counter(self, i: int, value: int) -> None:
+        if len(self.counters) <= i:
+            self.counters.extend([0] * (i + 1 - len(self.counters)))
+        self.counters[i] = value
+        self.counted |= 1 << i
+
+    # ---- dict 介面 ----
+    def __getitem__(self, name: str) -> Any:
+        i = self.registry.lookup(name)
+        if i is not None:
+            if self.bits >> i & 1:
+                return True
+            if self.off >> i & 1:
+                return False
+            if self.counted >> i & 1:
+                return self.counters[i]
+        return self.other[name]
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        i = self.registry.id(name)
+        self._drop(name, i)
+        bit = 1 << i
+        if isinstance(value, bool):
+            if value:
+                self.bits |= bit
+            else:
+                self.off |= bit
+        elif isinstance(value, int):
+            self._set_counter(i, value)
+        else:
+            self.other[name] = value
+        if value:
+            self.truthy |= bit
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self:
+            raise KeyError(name)
+        self._drop(name, self.registry.id(name))
+
+    def __contains__(self, name: object) -> bool:
+        i = self.registry.lookup(name) if isinstance(name, str) else None
+        if i is not None and (self.bits | self.off | self.counted) >> i & 1:
+            return True
+        return name in self.other
+
+    def __iter__(self) -> Iterator[str]:
+        for i in _iter_bits(self.bits | self.off | self.counted):
+            yield self.registry.name(i)
+        yield from list(self.other)
+
+    def __len__(self) -> int:
+        return bin(self.bits | self.off | self.counted).count("1") + len(self.other)
+
+    def __repr__(self) -> str:
+        return f"FlagStore({dict(self)!r})"
+
+    # ---- 存檔 ----
+    def pack(self) -> Dict[str, Any]:
+        """壓縮形式。id 小於 base 的來自 data/flags.json（只會追加，永遠有效）；
+        其餘是執行期登錄的名稱，依序記在 extra，讀檔時依名稱重新對應 id。"""
+        reg = self.registry
+        counters = [[i, self.counters[i]] for i in _iter_bits(self.counted)]
+        data = {"bits": format(self.bits, "x"), "counters": counters, "other": dict(self.other),
+                "base": reg.base, "extra": reg.extra}
+        if self.off:
+            data["off"] = format(self.off, "x")
+        return data
+
+    @classmethod
+    def unpack(cls, data: Dict[str, Any], registry: Optional[FlagRegistry] = None) -> "FlagStore":
+        store = cls(registry=registry)
+        reg = store.registry
+        base = int(data.get("base", reg.base))
+        extra = list(data.get("extra", ()))
+
+        def remap(i: int) -> Optional[int]:
+            if i < base:
+                return i
+            k = i - base
+            return reg.id(extra[k]) if k < len(extra) else None
+
+        for key, value in (("bits", True), ("off", False)):
+            for i in _iter_bits(int(data.get(key) or "0", 16)):
+                j = remap(i)
+                if j is not None:
+                    store[reg.name(j)] = value
+        for i, value in data.get("counters", []):
+            j = remap(int(i))
+            if j is not None:
+                store[reg.name(j)] = int(value)
+        store.other.update(data.get("other", {}))
+        for name, value in store.other.items():
+            if value:
+                store.truthy |= 1 << reg.id(name)
+        return store
+
+def is_packed(data: Any) -> bool:
+    return isinstance(data, dict) and isinstance(data.get("bits"), str) and isinstance(data.get("counters"), list)
+
+def ensure_flags(state: Dict[str, Any]) -> FlagStore:
+    """取得 state["flags"]；還是舊的 dict（或存檔的壓縮形式）時就地換成 FlagStore。"""
+    flags = state.get("flags")
+    if isinstance(flags, FlagStore):
+        return flags
+    if is_packed(flags):
+        store = FlagStore.unpack(flags)
+    else:
+        store = FlagStore(flags or {})
+    state["flags"] = store
+    return store
+
+def flag_bits(state: Dict[str, Any]) -> int:
+    """state 目前值為真的旗標位元集（與舊版 flags.get(name) 的真假一致）。"""
+    return ensure_flags(state).truthy
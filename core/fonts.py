@@ -0,0 +1,147 @@
+# project/core/fonts.py
+# 字體管理：依 (用途, 字級) 發放快取好的 Font 物件。
+# 中文字體的探測（match_font 會呼叫 fontconfig，很慢）結果寫進 data/cache/font_cache.json，
+# 之後啟動直接讀檔，不再探測；檔案不存在或 assets/fonts 有變動時才重新探測。
+from __future__ import annotations
+import json, os
+from typing import Dict, Optional, Tuple
+import pygame
+
+try:
+    from core.resource import proj_path, ensure_dir
+except Exception:
+    from pathlib import Path
+    def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
+    def ensure_dir(p): p.mkdir(parents=True, exist_ok=True); return p
+
+FONT_CACHE_PATH = proj_path("data", "cache", "font_cache.json")
+
+# 用途
+TEXT = "text"        # 一般文字（中文字體，找不到時退回 Arial / 預設字體）
+DEFAULT = "default"  # pygame 內建字體（只有英數字的場合）
+
+# 在這裡列出你優先想用的中文字體名稱（系統字體）
+_CJK_CANDIDATES = [
+    "Noto Sans CJK TC",
+    "Noto Sans TC",
+    "Microsoft JhengHei",
+    "PingFang TC",
+    "PingFang SC",
+    "Heiti TC",
+    "WenQuanYi Zen Hei",
+    "SimHei",
+    "Arial Unicode MS",
+    "font"
+]
+
+# 專案內的字體路徑（請把 TTF/OTF 丟到這裡）
+_PROJECT_FONT_DIR = str(proj_path("assets","fonts"))
+_PROJECT_FONT_FILES = [
+    "NotoSansTC-Regular.otf",
+    "NotoSansTC-Regular.ttf",
+    "Microsoft JhengHei.ttf",
+    "PingFang.ttc",
+    "WenQuanYi Zen Hei.ttf",
+    "font.ttf"
+]
+
+_PATH: Optional[str] = None      # 已解析的中文字體路徑；"" 表示找不到
+_FONTS: Dict[Tuple[str, int], pygame.font.Font] = {}
+
+def _find_cjk_font_path():
+    """優先找系統字體，找不到再用 assets/fonts/ 裡的檔案。"""
+    # 1) 系統字體
+    for name in _CJK_CANDIDATES:
+        try:
+            path = pygame.font.match_font(name)
+            if path:
+                return path
+        except Exception:
+            pass
+    # 2) 專案字體資料夾
+    if os.path.isdir(_PROJECT_FONT_DIR):
+        for f in _PROJECT_FONT_FILES:
+            p = os.path.join(_PROJECT_FONT_DIR, f)
+            if os.path.exists(p):
+                return p
+        # 若使用者放了不同檔名，也嘗試抓第一個 .ttf/.otf
+        for f in os.listdir(_PROJECT_FONT_DIR):
+            if f.lower().endswith((".ttf", ".otf", ".ttc")):
+                return os.path.join(_PROJECT_FONT_DIR, f)
+    return None  # 找不到就交給系統回退（可能不顯示中文）
+
+def _fonts_dir_stamp() -> Optional[int]:
+    try:
+        return os.stat(_PROJECT_FONT_DIR).st_mtime_ns
+    except OSError:
+        return None
+
+def _read_cached_path() -> Optional[str]:
+    try:
+        data = json.loads(FONT_CACHE_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    path = data.get("cjk_font")
+    if not isinstance(path, str) or data.get("fonts_dir") != _fonts_dir_stamp():
+        return None
+    if path and not os.path.exists(path):
+        return None
+    return path
+
+def _write_cached_path(path: str) -> None:
+    try:
+        ensure_dir(FONT_CACHE_PATH.parent)
+        FONT_CACHE_PATH.write_text(json.dumps({"cjk_font": path, "fonts_dir": _fonts_dir_stamp()}), encoding="utf-8")
+    except Exception:
+        pass
+
+def resolve_font_path() -> str:
+    """中文字體路徑（"" 表示找不到）；先讀快取檔，沒有才探測並寫回。可在工作執行緒呼叫。"""
+    path = _read_cached_path()
+    if path is None:
+        path = _find_cjk_font_path() or ""
+        _write_cached_path(path)
+    return path
+
+def set_font_path(path: Optional[str]) -> None:
+    """指定中文字體路徑（例如背景探測的結果）；已發出的字體會重建。"""
+    global _PATH
+    if path != _PATH:
+        _PATH = path or ""
+        _FONTS.clear()
+
+def font_path() -> str:
+    global _PATH
+    if _PATH is None:
+        _PATH = resolve_font_path()
+    return _PATH
+
+def _make(role: str, size: int) -> pygame.font.Font:
+    if not pygame.font.get_init():
+        pygame.font.init()
+    try:
+        if role == DEFAULT:
+            return pygame.font.Font(None, size)
+        path = font_path()
+        if path:
+            return pygame.font.Font(path, size)
+        # 萬一真的找不到，就用系統默認（可能無法顯示中文）
+        return pygame.font.SysFont("Arial", size)
+    except Exception:
+        # 保底
+        return pygame.font.SysFont(None, size)
+
+def get_font(role: str = TEXT, size: int = 20) -> pygame.font.Font:
+    """依 (用途, 字級) 取得共用的 Font 物件。"""
+    key = (role, int(size))
+    font = _FONTS.get(key)
+    if font is None:
+        font = _FONTS[key] = _make(role, key[1])
+    return font
+
+def font_key(font: pygame.font.Font) -> Optional[Tuple[str, int]]:
+    """反查字體管理器發出的 Font 對應的 (用途, 字級)；不是由這裡發出的回傳 None。"""
+    for key, f in _FONTS.items():
+        if f is font:
+            return key
+    return None
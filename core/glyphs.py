@@ -0,0 +1,102 @@
+# project/core/glyphs.py
+# 預先渲染的字形圖集（core/tools/build_glyph_atlas.py 產生）：
+#   assets/glyphs/glyphs_<size>.png  白色字形，shelf 排列
+#   assets/glyphs/glyphs_<size>.json {"font": 字體路徑, "size": 字級, "height": 行高, "glyphs": {字: [x, y, w, h]}}
+# 執行期把字串拆成字形逐一 blit，取代 FreeType 即時光柵化；圖集沒有的字才即時 font.render。
+# 英數字（有字距調整）整段交給 font.render，圖集只收非 ASCII 字。
+from __future__ import annotations
+import json
+from typing import Dict, Optional, Tuple
+import pygame
+from core import fonts
+
+try:
+    from core.resource import proj_path
+except Exception:
+    from pathlib import Path
+    def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
+
+GLYPH_DIR = proj_path("assets", "glyphs")
+
+Rect = Tuple[int, int, int, int]
+
+class GlyphAtlas:
+    def __init__(self, sheet: pygame.Surface, glyphs: Dict[str, Rect], height: int, font: pygame.font.Font):
+        self.sheet = sheet
+        self.glyphs = glyphs
+        self.height = height
+        self.font = font
+        self._tinted: Dict[tuple, pygame.Surface] = {}
+
+    def _sheet_for(self, color) -> pygame.Surface:
+        """依顏色染好的整張圖集（白色字形乘上顏色，alpha 不變）。"""
+        key = tuple(color)[:3]
+        sheet = self._tinted.get(key)
+        if sheet is None:
+            sheet = self.sheet.copy()
+            sheet.fill(key + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+            self._tinted[key] = sheet
+        return sheet
+
+    def render(self, text: str, color) -> pygame.Surface:
+        sheet = self._sheet_for(color)
+        pieces = []
+        run_start = None
+        for i, ch in enumerate(text):
+            g = self.glyphs.get(ch)
+            if g is None:
+                if run_start is None:
+                    run_start = i
+                continue
+            if run_start is not None:
+                # 圖集沒有的字（英數字等）：整段即時渲染
+                pieces.append(self.font.render(text[run_start:i], True, color))
+                run_start = None
+            pieces.append(sheet.subsurface(g))
+        if run_start is not None:
+            pieces.append(self.font.render(text[run_start:], True, color))
+        surf = pygame.Surface((sum(p.get_width() for p in pieces), self.height), pygame.SRCALPHA)
+        x = 0
+        for img in pieces:
+            # 字形互不重疊，MAX 等於直接複製（不會把邊緣跟透明底色混暗）
+            surf.blit(img, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += img.get_width()
+        return surf
+
+_ATLASES: Dict[pygame.font.Font, Optional[GlyphAtlas]] = {}
+
+def _load(size: int, font: pygame.font.Font) -> Optional[GlyphAtlas]:
+    meta_path = GLYPH_DIR / f"glyphs_{size}.json"
+    img_path = GLYPH_DIR / f"glyphs_{size}.png"
+    if not meta_path.exists() or not img_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        # 建圖集時用的字體與現在不同就不用（字形對不上）
+        if meta.get("font") != fonts.font_path() or meta.get("height") != font.get_height():
+            return None
+        sheet = pygame.image.load(str(img_path))
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        glyphs = {ch: tuple(r) for ch, r in meta.get("glyphs", {}).items()}
+        return GlyphAtlas(sheet, glyphs, meta["height"], font)
+    except Exception as e:
+        print(f"讀取字形圖集失敗: {e}")
+        return None
+
+def atlas_for(font: pygame.font.Font) -> Optional[GlyphAtlas]:
+    """font 是字體管理器發出的一般文字字體、且有對應字級的圖集時回傳圖集。"""
+    if font not in _ATLASES:
+        key = fonts.font_key(font)
+        _ATLASES[font] = _load(key[1], font) if key is not None and key[0] == fonts.TEXT else None
+    return _ATLASES[font]
+
+def render(font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+    """與 font.render(text, antialias, color) 相同用途；有圖集時以字形拼出。"""
+    atlas = atlas_for(font) if antialias and text else None
+    if atlas is None:
+        return font.render(text, antialias, color)
+    return atlas.render(text, color)
+
+def reload() -> None:
+    _ATLASES.clear()
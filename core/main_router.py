@@ -8,11 +8,13 @@
 #     會被導回新版流程（已跑完三章→roam；未跑完→start）。
 #  3) 非法直跳觸火教學（touch_fire_trial）時，若沒準備旗標則改回 start，避免一開機進灰底教學。
 
+from core.flags import ensure_flags
+
 LEGACY = {"world_map","campus","mind_hub","menu_text","legacy_menu","story_sence","menu"}
 ALLOWED = {"start","roam","touch_fire_trial","home_return"}
 
 def route_before_scene(state):
-    flags = state.setdefault("flags", {})
+    flags = ensure_flags(state)
     cur = state.get("current")
 
     # 1) Boot guard：第一次必進 start
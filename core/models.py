@@ -1,3 +1,5 @@
+from core.flags import FlagStore
+
 class Personality:
     def __init__(self, name, hp, atk):
         self.name = name; self.max_hp = hp; self.hp = hp
@@ -20,5 +22,6 @@ def build_initial_state(assets):
             Personality("冷靜", 48, 9),
             Personality("衝動", 42, 15),
         ],
+        "flags": FlagStore(),
         "scenes": {}
     }
@@ -2,6 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Any, Optional
 import json
+from core.flags import ensure_flags
 
 # 路徑相容：優先使用 core.resource.proj_path，沒有就用相對路徑
 try:
@@ -83,7 +84,7 @@ def _apply_effects(state: Dict, effects: List[Dict[str, Any]]):
             if txt:
                 push_note(state, f"屬性變化：{txt}")
         if "flag" in eff:
-            flags = state.setdefault("flags", {})
+            flags = ensure_flags(state)
             for fk, val in (eff["flag"] or {}).items():
                 flags[fk] = bool(val)
 
@@ -3,11 +3,12 @@ from __future__ import annotations
 import time
 import pygame
 from typing import Dict, Any
+from core.fonts import get_font
 try:
     from core.ui import draw_text
 except Exception:
     def draw_text(surface, txt, pos, color=(240,240,240), small=False):
-        font = pygame.font.SysFont(None, 20 if small else 24)
+        font = get_font("text", 20 if small else 24)
         surface.blit(font.render(str(txt), True, color), pos)
 
 try:
@@ -0,0 +1,183 @@
+# project/core/preload.py
+# 背景解碼：在工作執行緒上把 PNG 解碼（並縮放）成顯示格式的原始位元組，
+# 主執行緒再以 frombuffer 轉成 Surface。已在磁碟快取的縮放結果直接讀回，不解碼。
+# 啟動時配合 run_loading_screen() 使用，讓畫面在載入期間持續更新。
+from __future__ import annotations
+import os, sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import pygame
+from core import disk_cache
+from core.sprite_bank import bank_name, get_bank
+from core.fonts import get_font
+
+try:
+    from core.config import WIDTH, HEIGHT, FPS, COLOR
+except Exception:
+    WIDTH, HEIGHT, FPS = 960, 540, 60
+    COLOR = {"bg": (18,18,22), "text": (240,240,240), "hint": (200,200,120)}
+
+def _norm(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+def _decode_raw(path: str, size, smooth: bool, fmt: str) -> disk_cache.Raw:
+    """工作執行緒：讀磁碟快取或解碼＋縮放，不碰 display。"""
+    if size:
+        raw = disk_cache.read_raw(path, size, smooth)
+        if raw is not None:
+            return raw
+    img = pygame.image.load(path)
+    if size and img.get_size() != size:
+        if smooth and img.get_bitsize() not in (24, 32):
+            # smoothscale 只接受 24/32 位元；調色盤圖先攤平
+            flat = pygame.Surface(img.get_size(), pygame.SRCALPHA, 32)
+            flat.blit(img, (0, 0))
+            img = flat
+        img = (pygame.transform.smoothscale if smooth else pygame.transform.scale)(img, size)
+    data = pygame.image.tobytes(img, fmt)
+    if size:
+        disk_cache.write_raw(path, size, smooth, None, data, img.get_size(), fmt)
+    return data, img.get_size(), fmt
+
+class AssetPreloader:
+    def __init__(self, workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="asset-decode")
+        self._images: Dict[str, Future] = {}   # 依提交順序（最舊的在前）
+        self._tasks: Dict[str, Future] = {}
+        self._groups: Dict[str, set] = {}      # 群組 -> 提交過的 key（劇情預取、skin 預取）
+        self._closed: set = set()
+
+    # ---- 提交（主執行緒；預取群組也可能從背景工作提交） ----
+    def submit(self, path, size: Optional[Tuple[int, int]] = None, smooth: bool = True,
+               group: Optional[str] = None) -> None:
+        if group is not None and group in self._closed:
+            return   # 群組已丟棄（例如劇情已結束），晚到的預取不再接受
+        size = tuple(size) if size else None
+        key = (_norm(path), size, smooth)
+        bank = get_bank()
+        if bank is not None and bank_name(path, size, smooth) in bank and not bank.is_stale(path):
+            return   # 精靈庫已有，執行期直接 mmap，不必解碼
+        if key not in self._images and os.path.exists(key[0]):
+            self._images[key] = self._pool.submit(_decode_raw, key[0], size, smooth, disk_cache.display_format())
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+
+    def submit_many(self, requests: Iterable, group: Optional[str] = None) -> None:
+        """每項可以是路徑，或 (路徑, 尺寸[, smooth]) tuple。"""
+        for req in requests:
+            if isinstance(req, tuple):
+                self.submit(*req, group=group)
+            else:
+                self.submit(req, group=group)
+
+    def submit_task(self, name: str, fn: Callable[[], Any]) -> None:
+        """非圖片的啟動工作（例如字體探測）也可以丟到背景。"""
+        if name not in self._tasks:
+            self._tasks[name] = self._pool.submit(fn)
+
+    # ---- 取用（主執行緒） ----
+    def has(self, path, size=None, smooth: bool = True) -> bool:
+        return (_norm(path), tuple(size) if size else None, smooth) in self._images
+
+    def take(self, path, size=None, smooth: bool = True) -> Optional[pygame.Surface]:
+        """取出已解碼（已縮放）的圖片；尚未完成時只等待這一張。"""
+        fut = self._images.pop((_norm(path), tuple(size) if size else None, smooth), None)
+        if fut is None:
+            return None
+        try:
+            return disk_cache.surface_from_raw(fut.result())
+        except Exception:
+            return None
+
+    def task_result(self, name: str, default=None):
+        fut = self._tasks.get(name)
+        if fut is None:
+            return default
+        try:
+            return fut.result()
+        except Exception:
+            return default
+
+    # ---- 未取用結果的回收 ----
+    def drop_group(self, group: str, close: bool = False) -> int:
+        """丟掉群組裡還沒被 take 的結果，回傳丟掉的筆數。
+        同名的背景工作（例如劇情預取的 warm）也一併移除；close 時它跑完之前晚到的提交一律忽略，
+        跑完後再清一次漏網的結果並撤掉標記，_tasks / _closed 不會隨播放次數累積。"""
+        dropped = self._drop_keys(group)
+        task = self._tasks.pop(group, None)
+        if close and task is not None:
+            self._closed.add(group)
+            task.cancel()
+            task.add_done_callback(lambda _f: self._release_group(group))
+        return dropped
+
+    def _drop_keys(self, group: str) -> int:
+        dropped = 0
+        for key in self._groups.pop(group, ()):
+            fut = self._images.pop(key, None)
+            if fut is not None:
+                fut.cancel()
+                dropped += 1
+        return dropped
+
+    def _release_group(self, group: str) -> None:
+        # 群組的背景工作結束後呼叫（可能在工作執行緒上）
+        self._drop_keys(group)
+        self._closed.discard(group)
+
+    @staticmethod
+    def _raw_bytes(fut: Future) -> int:
+        if not fut.done() or fut.cancelled() or fut.exception() is not None:
+            return 0
+        return len(fut.result()[0])
+
+    def unclaimed_bytes(self) -> int:
+        """已解碼完成、還沒被 take 的原始像素總位元組數。"""
+        return sum(self._raw_bytes(f) for f in list(self._images.values()))
+
+    def trim(self, max_bytes: int) -> int:
+        """未取用的結果超過 max_bytes 時從最舊的開始丟，回傳釋放的位元組數。"""
+        items = list(self._images.items())
+        total = sum(self._raw_bytes(f) for _, f in items)
+        freed = 0
+        for key, fut in items:
+            if total <= max_bytes:
+                break
+            size = self._raw_bytes(fut)
+            if size and self._images.pop(key, None) is not None:
+                total -= size
+                freed += size
+        return freed
+
+    # ---- 進度 ----
+    def progress(self) -> Tuple[int, int]:
+        futs = list(self._images.values()) + list(self._tasks.values())
+        return sum(1 for f in futs if f.done()), len(futs)
+
+    def done(self) -> bool:
+        finished, total = self.progress()
+        return finished >= total
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+def run_loading_screen(screen: pygame.Surface, preloader: AssetPreloader, clock: pygame.time.Clock = None) -> None:
+    """在背景解碼完成前持續處理事件並以完整幀率繪製進度條。"""
+    clock = clock or pygame.time.Clock()
+    font = get_font("default", 24)
+    bar = pygame.Rect(WIDTH // 4, HEIGHT // 2, WIDTH // 2, 16)
+    while not preloader.done():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                preloader.shutdown()
+                pygame.quit(); sys.exit()
+        finished, total = preloader.progress()
+        ratio = finished / total if total else 1.0
+        screen.fill(COLOR.get("bg", (18,18,22)))
+        pygame.draw.rect(screen, (60,60,70), bar)
+        pygame.draw.rect(screen, COLOR.get("hint", (200,200,120)), (bar.x, bar.y, int(bar.w * ratio), bar.h))
+        pygame.draw.rect(screen, (0,0,0), bar, 2)
+        label = font.render(f"Loading... {finished}/{total}", True, COLOR.get("text", (240,240,240)))
+        screen.blit(label, (bar.x, bar.y - 28))
+        pygame.display.flip()
+        clock.tick(FPS)
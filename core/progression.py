@@ -7,6 +7,7 @@ try:
 except Exception:
     ACTION_POINTS_PER_DAY = 3
 from core.emotions import ensure_emotions, get_emotion
+from core.flags import ensure_flags
 
 @dataclass
 class Calendar:
@@ -52,9 +53,9 @@ def end_day(state: Dict[str, Any]) -> None:
     ensure_emotions(state)
     if get_emotion(state, 'stress') >= 50:
         state['current'] = 'dream_trial'
-    state.setdefault("flags", {})
-    state["flags"].setdefault("night_count", 0)
-    state["flags"]["night_count"] += 1
+    flags = ensure_flags(state)
+    flags.setdefault("night_count", 0)
+    flags["night_count"] += 1
 
 def debug_label(state: Dict[str, Any]) -> str:
     ensure_progression_state(state)
@@ -0,0 +1,146 @@
+# project/core/richtext.py
+# 對話文字的行內標記，載入時編譯一次成樣式片段（run），繪製時只需照片段 blit：
+#   [color=#ff8080]…[/color]  或 [color=hint]（COLOR 裡的名稱）  文字顏色
+#   [em]…[/em]                                                   強調（強調色）
+#   [speed=20]…[/speed]                                          打字速度（字/秒）
+#   [pause=0.5]                                                  在此停頓（秒）
+#   [[                                                           字面上的 "["
+# 不認得的標籤原樣保留。
+from __future__ import annotations
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+import pygame
+from core import glyphs
+
+try:
+    from core.config import COLOR
+except Exception:
+    COLOR = {"text": (240,240,240), "hint": (200,200,120)}
+
+EMPHASIS_COLOR = (255, 220, 120)
+
+Color = Tuple[int, int, int]
+
+_TAG = re.compile(r"\[\[|\[(/?)(color|em|speed|pause)(?:=([^\]]*))?\]")
+
+@dataclass(frozen=True)
+class Run:
+    """plain[start:end] 這一段的樣式；color / speed 為 None 表示用呼叫端的預設值。"""
+    start: int
+    end: int
+    color: Optional[Color] = None
+    speed: Optional[float] = None
+
+@dataclass
+class RichText:
+    plain: str
+    runs: Tuple[Run, ...]
+    pauses: Dict[int, float] = field(default_factory=dict)   # 第 i 個字出現前的停頓
+    _times: Dict[float, List[float]] = field(default_factory=dict, repr=False)
+
+    @property
+    def styled(self) -> bool:
+        return bool(self.pauses) or any(r.color is not None or r.speed is not None for r in self.runs)
+
+    def segments(self, a: int, b: int) -> Iterator[Tuple[int, int, Optional[Color]]]:
+        """plain[a:b] 依顏色切開的 (起, 迄, 顏色)。"""
+        for run in self.runs:
+            s, e = max(a, run.start), min(b, run.end)
+            if s < e:
+                yield s, e, run.color
+
+    def reveal_times(self, speed: float) -> List[float]:
+        """每個字出現的時間（秒）；以預設速度 speed 計算，依速度快取。"""
+        times = self._times.get(speed)
+        if times is None:
+            times, t = [], 0.0
+            for run in self.runs:
+                step = 1.0 / (run.speed or speed)
+                for i in range(run.start, run.end):
+                    t += self.pauses.get(i, 0.0) + step
+                    times.append(t)
+            self._times[speed] = times
+        return times
+
+    def chars_at(self, t: float, speed: float) -> int:
+        """打字機經過 t 秒後應顯示的字數。"""
+        return bisect_right(self.reveal_times(speed), t + 1e-9)
+
+def _parse_color(value: str) -> Optional[Color]:
+    value = (value or "").strip()
+    if value in COLOR:
+        return tuple(COLOR[value][:3])
+    try:
+        c = pygame.Color(value)
+        return (c.r, c.g, c.b)
+    except (ValueError, TypeError):
+        return None
+
+def compile_markup(text: str) -> RichText:
+    """把含標記的文字編譯成 RichText（純文字 + 樣式片段 + 停頓位置）。"""
+    text = str(text or "")
+    plain: List[str] = []
+    runs: List[Run] = []
+    pauses: Dict[int, float] = {}
+    colors: List[Optional[Color]] = [None]
+    speeds: List[Optional[float]] = [None]
+    n = 0            # 目前純文字長度
+    run_start = 0
+
+    def close_run():
+        nonlocal run_start
+        if n > run_start:
+            style = (colors[-1], speeds[-1])
+            if runs and (runs[-1].color, runs[-1].speed) == style and runs[-1].end == run_start:
+                runs[-1] = Run(runs[-1].start, n, *style)
+            else:
+                runs.append(Run(run_start, n, *style))
+        run_start = n
+
+    pos = 0
+    for m in _TAG.finditer(text):
+        chunk = text[pos:m.start()]
+        plain.append(chunk); n += len(chunk)
+        pos = m.end()
+        if m.group(0) == "[[":
+            plain.append("["); n += 1
+            continue
+        closing, tag, value = m.group(1), m.group(2), m.group(3)
+        if tag == "pause":
+            try:
+                pauses[n] = pauses.get(n, 0.0) + float(value)
+            except (TypeError, ValueError):
+                plain.append(m.group(0)); n += len(m.group(0))
+            continue
+        close_run()
+        if tag == "speed":
+            if closing:
+                if len(speeds) > 1: speeds.pop()
+            else:
+                try:
+                    speeds.append(max(1.0, float(value)))
+                except (TypeError, ValueError):
+                    speeds.append(speeds[-1])
+        else:
+            if closing:
+                if len(colors) > 1: colors.pop()
+            else:
+                colors.append(EMPHASIS_COLOR if tag == "em" else (_parse_color(value) or colors[-1]))
+    chunk = text[pos:]
+    plain.append(chunk); n += len(chunk)
+    close_run()
+    return RichText("".join(plain), tuple(runs), pauses)
+
+def render_span(font: pygame.font.Font, rich: RichText, a: int, b: int, color) -> pygame.Surface:
+    """渲染 plain[a:b]（通常是排版後的一行或其前段），各片段用自己的顏色。"""
+    pieces = [glyphs.render(font, rich.plain[s:e], c or color) for s, e, c in rich.segments(a, b)]
+    if len(pieces) == 1:
+        return pieces[0]
+    surf = pygame.Surface((sum(p.get_width() for p in pieces), font.get_height()), pygame.SRCALPHA)
+    x = 0
+    for img in pieces:
+        surf.blit(img, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        x += img.get_width()
+    return surf
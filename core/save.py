@@ -11,12 +11,16 @@ except Exception:
     def proj_path(*parts): return Path(__file__).resolve().parents[1].joinpath(*parts)
     def ensure_dir(p: Path): p.mkdir(parents=True, exist_ok=True)
 
+from core.flags import FlagStore, ensure_flags
+
 try:
     from core.models import Personality
 except Exception:
     Personality = None  # type: ignore
 
 SAVE_DIR = proj_path("data", "save")
+# 自動存檔（例如劇情中途關閉視窗）寫在獨立檔案，不覆蓋玩家的手動存檔
+AUTOSAVE_PATH = SAVE_DIR / "autosave.json"
 
 def _slot_path(slot:int=0) -> Path:
     return SAVE_DIR / f"slot{slot}.json"
@@ -48,6 +52,9 @@ def _sanitize_for_save(state: Dict[str, Any]) -> Dict[str, Any]:
         if k in ("assets", "scenes"):
             continue
         s[k] = v
+    # "exit" 只是通知宿主迴圈結束的標記，不是可以讀回來的場景
+    if s.get("current") == "exit":
+        s.pop("current")
     if isinstance(s.get("personalities"), list):
         new_list: List[Any] = []
         for item in s["personalities"]:
@@ -56,6 +63,9 @@ def _sanitize_for_save(state: Dict[str, Any]) -> Dict[str, Any]:
             else:
                 new_list.append(item)
         s["personalities"] = new_list
+    # 旗標存成壓縮形式（位元集 + 計數器），id 由 data/flags.json 固定
+    if isinstance(s.get("flags"), FlagStore):
+        s["flags"] = s["flags"].pack()
     return s
 
 def _restore_after_load(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -67,20 +77,19 @@ def _restore_after_load(state: Dict[str, Any]) -> Dict[str, Any]:
             else:
                 rebuilt.append(item)
         state["personalities"] = rebuilt
+    ensure_flags(state)   # 壓縮形式或舊存檔的 dict 都換回 FlagStore
     return state
 
-def save_state(state: Dict[str, Any], slot:int=0) -> Path:
+def _write(state: Dict[str, Any], p: Path) -> Path:
     ensure_dir(SAVE_DIR)
     # 記錄 UI 提示時間
     state.setdefault("ui", {})["last_saved_at"] = time.time()
     payload = _sanitize_for_save(state)
-    p = _slot_path(slot)
     with open(p, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
     return p
 
-def load_state(slot:int=0) -> Optional[Dict[str, Any]]:
-    p = _slot_path(slot)
+def _read(p: Path) -> Optional[Dict[str, Any]]:
     if not p.exists():
         return None
     try:
@@ -88,3 +97,24 @@ def load_state(slot:int=0) -> Optional[Dict[str, Any]]:
         return _restore_after_load(data)
     except Exception:
         return None
+
+def save_state(state: Dict[str, Any], slot:int=0) -> Path:
+    return _write(state, _slot_path(slot))
+
+def load_state(slot:int=0) -> Optional[Dict[str, Any]]:
+    return _read(_slot_path(slot))
+
+def save_autosave(state: Dict[str, Any]) -> Path:
+    return _write(state, AUTOSAVE_PATH)
+
+def load_autosave() -> Optional[Dict[str, Any]]:
+    return _read(AUTOSAVE_PATH)
+
+def load_latest(slot:int=0) -> Optional[Dict[str, Any]]:
+    """「繼續」用：手動存檔與自動存檔中較新的一個（依檔案修改時間）。"""
+    paths = [p for p in (_slot_path(slot), AUTOSAVE_PATH) if p.exists()]
+    for p in sorted(paths, key=lambda p: p.stat().st_mtime, reverse=True):
+        data = _read(p)
+        if data is not None:
+            return data
+    return None
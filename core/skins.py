@@ -1,6 +1,7 @@
 from __future__ import annotations
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 try:
     from core.resource import proj_path
@@ -8,29 +9,106 @@ except Exception:
     proj_path = lambda *parts: Path(__file__).resolve().parents[1].joinpath(*parts)
 
 SKINS_DIR = proj_path("assets","skins")
+PORTRAITS_DIR = proj_path("assets","portraits")
+
+# 目錄 mtime 沒變就沿用上次掃描的結果
+_SKIN_LIST: Optional[Tuple[Optional[int], List[str]]] = None
+# skin -> (各來源目錄 mtime, 立繪檔名 -> 實際路徑)
+_PORTRAIT_TABLES: Dict[str, Tuple[tuple, Dict[str, Path]]] = {}
+
+def _mtime(p: Path) -> Optional[int]:
+    try:
+        return os.stat(p).st_mtime_ns
+    except OSError:
+        return None
 
 def list_skins() -> List[str]:
-    if not SKINS_DIR.exists():
-        return ["default"]
+    global _SKIN_LIST
+    stamp = _mtime(SKINS_DIR)
+    if _SKIN_LIST is not None and _SKIN_LIST[0] == stamp:
+        return list(_SKIN_LIST[1])
     names = ["default"]
-    for p in SKINS_DIR.iterdir():
-        if p.is_dir():
-            names.append(p.name)
-    return sorted(set(names))
+    if stamp is not None:
+        for p in SKINS_DIR.iterdir():
+            if p.is_dir():
+                names.append(p.name)
+    _SKIN_LIST = (stamp, sorted(set(names)))
+    return list(_SKIN_LIST[1])
 
 def get_current_skin(state: Dict[str, Any]) -> str:
     return state.get("skin","default")
 
+def _portrait_dirs(skin: str) -> List[Path]:
+    """由低到高的優先順序：預設立繪，再疊上 skin 覆寫。"""
+    dirs = [PORTRAITS_DIR]
+    if skin and skin != "default":
+        dirs.append(SKINS_DIR / skin / "portraits")
+    return dirs
+
+def portrait_table(skin: str) -> Dict[str, Path]:
+    """立繪解析表（檔名 -> 路徑）；來源目錄的 mtime 有變才重新掃描。"""
+    dirs = _portrait_dirs(skin)
+    stamp = tuple(_mtime(d) for d in dirs)
+    hit = _PORTRAIT_TABLES.get(skin)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    table: Dict[str, Path] = {}
+    for d, mt in zip(dirs, stamp):
+        if mt is None:
+            continue
+        with os.scandir(d) as it:
+            for ent in it:
+                if ent.name.lower().endswith(".png") and ent.is_file():
+                    table[ent.name] = Path(ent.path)
+    _PORTRAIT_TABLES[skin] = (stamp, table)
+    return table
+
+def _portrait_file(filename: str) -> str:
+    return filename if filename.lower().endswith(".png") else filename + ".png"
+
+def find_portrait(state: Dict[str, Any], filename: str) -> Optional[Path]:
+    """查表取得立繪路徑；找不到回傳 None。不做檔案系統存取（表已建立時）。"""
+    skin = get_current_skin(state)
+    hit = _PORTRAIT_TABLES.get(skin)
+    table = hit[1] if hit is not None else portrait_table(skin)
+    return table.get(_portrait_file(filename))
+
+def prefetch_portraits(skin: str, size=None) -> None:
+    """切換 skin 後在背景先解碼新 skin 的立繪（需有預載器）。"""
+    try:
+        from core.asset_manager import get_asset_manager
+    except Exception:
+        return
+    preloader = get_asset_manager().preloader
+    if preloader is None:
+        return
+    if size is None:
+        try:
+            from core.config import DIALOGUE_PORTRAIT_SIZE as size
+        except Exception:
+            size = (96, 96)
+    preloader.submit_many(((str(p), size) for p in portrait_table(skin).values()), group=f"skin:{skin}")
+
+def drop_portrait_prefetch(skin: str) -> None:
+    """丟掉某個 skin 預取但還沒用到的立繪（換掉 skin 時呼叫）。"""
+    try:
+        from core.asset_manager import get_asset_manager
+    except Exception:
+        return
+    preloader = get_asset_manager().preloader
+    if preloader is not None:
+        preloader.drop_group(f"skin:{skin}")
+
 def set_skin(state: Dict[str, Any], name: str) -> None:
     if name not in list_skins():
         name = "default"
+    old = state.get("skin")
     state["skin"] = name
+    if old and old != name:
+        drop_portrait_prefetch(old)
+    portrait_table(name)
+    prefetch_portraits(name)
 
 def resolve_portrait_path(state: Dict[str, Any], filename: str) -> Path:
-    base = filename if filename.lower().endswith(".png") else filename + ".png"
-    skin = get_current_skin(state)
-    if skin and skin != "default":
-        cand = SKINS_DIR / skin / "portraits" / base
-        if cand.exists():
-            return cand
-    return proj_path("assets","portraits", base)
+    hit = find_portrait(state, filename)
+    return hit if hit is not None else PORTRAITS_DIR / _portrait_file(filename)
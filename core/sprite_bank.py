@@ -0,0 +1,117 @@
+# project/core/sprite_bank.py
+# 打包好的精靈庫（assets/sprites.bank）：檔頭索引 (name, w, h, pitch, offset, format)，
+# 後面接原始像素。執行期以 mmap 開啟，用 frombuffer 零複製建立 Surface，
+# 像素由作業系統按需分頁載入，而不是解碼進私有記憶體。
+#
+# 檔案格式（little-endian）：
+#   header : magic "SPRBANK1" | u32 count
+#   entry  : u16 name_len | name (utf-8) | u16 w | u16 h | u32 pitch | u64 offset | 4s format
+#   data   : 各 entry 的像素，offset 為檔案絕對位置（4 bytes 對齊）
+from __future__ import annotations
+import mmap, os, struct
+from typing import Dict, Iterable, Optional, Tuple
+import pygame
+
+try:
+    from core.resource import proj_path, BASE_DIR
+except Exception:
+    from pathlib import Path
+    BASE_DIR = Path(__file__).resolve().parents[1]
+    def proj_path(*parts): return BASE_DIR.joinpath(*parts)
+
+BANK_PATH = proj_path("assets", "sprites.bank")
+
+_MAGIC = b"SPRBANK1"
+_HEAD = struct.Struct("<8sI")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<HHIQ4s")
+
+Entry = Tuple[int, int, int, int, str]   # w, h, pitch, offset, format
+
+def bank_name(path, size=None, smooth: bool = True, rect=None) -> str:
+    """精靈在庫中的名稱：相對專案根的路徑，加上切割區域與目標尺寸。"""
+    name = os.path.relpath(os.path.abspath(str(path)), str(BASE_DIR)).replace(os.sep, "/")
+    if rect:
+        name += "#%d,%d,%d,%d" % tuple(rect)
+    if size:
+        name += "@%dx%d%s" % (size[0], size[1], "" if smooth else "n")
+    return name
+
+class SpriteBank:
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        # ACCESS_COPY：頁面按需從檔案載入；萬一有人寫入 Surface 也只改私有副本
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.built_at = os.path.getmtime(self.path)
+        self.index: Dict[str, Entry] = self._read_index()
+
+    def _read_index(self) -> Dict[str, Entry]:
+        magic, count = _HEAD.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"不是精靈庫檔案: {self.path}")
+        pos = _HEAD.size
+        index = {}
+        for _ in range(count):
+            (n,) = _NAME_LEN.unpack_from(self._mm, pos); pos += _NAME_LEN.size
+            name = bytes(self._mm[pos:pos + n]).decode("utf-8"); pos += n
+            w, h, pitch, offset, fmt = _ENTRY.unpack_from(self._mm, pos); pos += _ENTRY.size
+            index[name] = (w, h, pitch, offset, fmt.decode("ascii"))
+        return index
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def get(self, name: str) -> Optional[pygame.Surface]:
+        ent = self.index.get(name)
+        if ent is None:
+            return None
+        w, h, pitch, offset, fmt = ent
+        view = memoryview(self._mm)[offset:offset + pitch * h]
+        return pygame.image.frombuffer(view, (w, h), fmt, pitch)
+
+    def is_stale(self, source) -> bool:
+        try:
+            return os.path.getmtime(str(source)) > self.built_at
+        except OSError:
+            return False
+
+def write_bank(path, sprites: Iterable[Tuple[str, pygame.Surface]], fmt: str = "BGRA") -> int:
+    """把 (name, Surface) 寫成精靈庫，回傳張數。"""
+    items = [(name.encode("utf-8"), surf) for name, surf in sprites]
+    header_size = _HEAD.size + sum(_NAME_LEN.size + len(n) + _ENTRY.size for n, _ in items)
+    offset = (header_size + 3) & ~3
+    entries, blobs = [], []
+    for name, surf in items:
+        w, h = surf.get_size()
+        data = pygame.image.tobytes(surf, fmt)
+        entries.append((name, w, h, w * 4, offset))
+        blobs.append(data)
+        offset += (len(data) + 3) & ~3
+    tmp = str(path) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEAD.pack(_MAGIC, len(entries)))
+        for name, w, h, pitch, off in entries:
+            f.write(_NAME_LEN.pack(len(name))); f.write(name)
+            f.write(_ENTRY.pack(w, h, pitch, off, fmt.encode("ascii")))
+        for (_, _, _, _, off), data in zip(entries, blobs):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(data)
+    os.replace(tmp, str(path))
+    return len(entries)
+
+_BANK: Optional[SpriteBank] = None
+_BANK_CHECKED = False
+
+def get_bank() -> Optional[SpriteBank]:
+    """開啟預設精靈庫；沒有建置時回傳 None。"""
+    global _BANK, _BANK_CHECKED
+    if not _BANK_CHECKED:
+        _BANK_CHECKED = True
+        if BANK_PATH.exists():
+            try:
+                _BANK = SpriteBank(BANK_PATH)
+            except Exception as e:
+                print(f"讀取精靈庫失敗: {e}")
+                _BANK = None
+    return _BANK
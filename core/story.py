@@ -3,9 +3,10 @@ import pygame
 from typing import Dict, List
 from core.dialogue import run_dialogue
 from core.overlay_hook import push_note
+from core.flags import ensure_flags
 
 def _ensure_flags(state: Dict):
-    return state.setdefault("flags", {})
+    return ensure_flags(state)
 
 def play_intro(screen, state: Dict) -> None:
     """在教室播放序章到『火種子』，不會卡住。"""
@@ -1,15 +1,31 @@
 from __future__ import annotations
 import json, pygame
-from typing import Dict, Any, List, Optional
+from collections import deque
+from itertools import count
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
+from core.fonts import get_font
+from core.ui import ListView, Menu
+from core.flags import ensure_flags, flag_bits, flag_mask
+
+try:
+    from core.config import WIDTH, HEIGHT
+except Exception:
+    WIDTH, HEIGHT = 960, 540
+try:
+    from core.config import DIALOGUE_IDLE_WAIT_MS
+except Exception:
+    DIALOGUE_IDLE_WAIT_MS = 250
 
 # Dialogue fallbacks
 try:
-    from core.dialogue import run_dialogue, run_lines
+    from core.dialogue import DialoguePlayer, run_dialogue, run_lines
 except Exception:
+    DialoguePlayer = None   # 沒有非阻塞對話框時 FlowRunner 改用阻塞的 run_dialogue
     def run_lines(screen, lines, **kw):
         import pygame
-        font = pygame.font.SysFont(None, 22)
+        font = get_font("text", 22)
         screen.fill((0,0,0))
         y = 40
         for ln in lines:
@@ -53,11 +69,137 @@ def load_flow(flow_id: str) -> Dict[str, Any]:
     p = STORY_DIR / f"{flow_id}.json"
     return _load_json(p)
 
+# ---- 編譯後的劇情：節點排成陣列，next 是索引（-1 表示結束） ----
+@dataclass(frozen=True)
+class Cond:
+    require: int = 0          # 必須全部成立的旗標遮罩
+    forbid: int = 0           # 任一成立就不行的旗標遮罩
+    require_ap: int = 0
+
+    def ok(self, bits: int, ap: int) -> bool:
+        return (bits & self.require) == self.require and not (bits & self.forbid) and ap >= self.require_ap
+
+@dataclass(frozen=True)
+class Choice:
+    text: str
+    next: int
+    effects: Tuple[Dict[str, Any], ...]
+    cond: Cond
+
+@dataclass(frozen=True)
+class Node:
+    key: str
+    dialogue: Optional[str]
+    effects: Tuple[Dict[str, Any], ...]
+    move_to: Optional[str]
+    next: int
+    choices: Tuple[Choice, ...]
+    cond: Cond
+
+@dataclass(frozen=True)
+class CompiledFlow:
+    id: str
+    title: str
+    start: int
+    nodes: Tuple[Node, ...]
+    index: Dict[str, int]
+    dialogues: Tuple[str, ...]   # 可到達的對話，依圖上距離排序（預載用）
+
+def _cond(rec: Dict[str, Any]) -> Cond:
+    return Cond(flag_mask(rec.get("require_flags")), flag_mask(rec.get("forbid_flags")), int(rec.get("require_ap", 0)))
+
+def compile_flow(flow_id: str, flow: Dict[str, Any]) -> CompiledFlow:
+    raw = flow.get("nodes", {})
+    index = {key: i for i, key in enumerate(raw)}
+    ref = lambda key: index.get(key, -1) if key else -1   # 指向不存在的節點等於結束
+    nodes = []
+    for key, rec in raw.items():
+        rec = rec or {}
+        choices = tuple(Choice(ch.get("text", "(無)"), ref(ch.get("next")), tuple(ch.get("effects", [])), _cond(ch))
+                        for ch in rec.get("choices", []))
+        nodes.append(Node(key, rec.get("dialogue"), tuple(rec.get("effects", [])), rec.get("move_to"),
+                          ref(rec.get("next")), choices, _cond(rec)))
+    return CompiledFlow(flow_id, flow.get("title", flow_id), ref(flow.get("start")), tuple(nodes), index,
+                        tuple(reachable_dialogues(flow)))
+
+_COMPILED: Dict[str, Tuple[float, CompiledFlow]] = {}
+
+def get_flow(flow_id: str) -> CompiledFlow:
+    """取得編譯後的劇情；JSON 沒有變動時不重新解析。"""
+    p = STORY_DIR / f"{flow_id}.json"
+    mtime = p.stat().st_mtime
+    hit = _COMPILED.get(flow_id)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    compiled = compile_flow(flow_id, _load_json(p))
+    _COMPILED[flow_id] = (mtime, compiled)
+    return compiled
+
+def reachable_dialogues(flow: Dict[str, Any]) -> List[str]:
+    """從 start 沿 next / choices[].next 廣度優先走訪，依圖上距離回傳用到的對話 id（不重複）。"""
+    nodes = flow.get("nodes", {})
+    start = flow.get("start")
+    queue = deque([start] if start else [])
+    seen = set(queue)
+    out: List[str] = []
+    while queue:
+        node = nodes.get(queue.popleft()) or {}
+        did = node.get("dialogue")
+        if did and did not in out:
+            out.append(did)
+        if node.get("move_to"):
+            continue   # 換場景，劇情在這裡結束
+        if node.get("choices"):
+            nexts = [ch.get("next") for ch in node["choices"]]
+        else:
+            nexts = [node.get("next")]
+        for key in nexts:
+            if key and key not in seen:
+                seen.add(key)
+                queue.append(key)
+    return out
+
+def prefetch_flow(state: Dict[str, Any], flow: CompiledFlow, group: Optional[str] = None) -> None:
+    """在背景依圖上距離先解碼劇情會用到的對話，並把其立繪交給預載器解碼，
+    讓章節內的節點切換不必讀磁碟。沒有預載器（未經 main 啟動）時不做事。
+    立繪記在預載器的 group 群組下，劇情結束時用 drop_flow_prefetch 丟掉沒用到的。"""
+    try:
+        from core.asset_manager import get_asset_manager
+        from core.dialogue import portrait_requests
+        from core.skins import get_current_skin
+    except Exception:
+        return
+    preloader = get_asset_manager().preloader
+    if preloader is None:
+        return
+    order = flow.dialogues
+    skin = get_current_skin(state)
+    group = group or f"flow:{flow.id}:{skin}"
+
+    def warm() -> int:
+        for did in order:
+            try:
+                preloader.submit_many(portrait_requests(did, skin), group=group)
+            except Exception:
+                pass   # 缺檔的對話留給 run_flow 顯示占位
+        return len(order)
+    preloader.submit_task(group, warm)
+
+def drop_flow_prefetch(group: str) -> None:
+    """丟掉劇情預取群組裡還沒被取用的立繪與它的預取工作（工作跑完前晚到的提交也不收）。"""
+    try:
+        from core.asset_manager import get_asset_manager
+    except Exception:
+        return
+    preloader = get_asset_manager().preloader
+    if preloader is not None:
+        preloader.drop_group(group, close=True)
+
 def _effects_apply(state: Dict[str,Any], eff: Dict[str,Any]):
     if "set_flag" in eff:
-        state.setdefault("flags", {})[eff["set_flag"]] = True
+        ensure_flags(state)[eff["set_flag"]] = True
     if "unset_flag" in eff:
-        state.setdefault("flags", {}).pop(eff["unset_flag"], None)
+        ensure_flags(state).pop(eff["unset_flag"], None)
     if "ap_cost" in eff:
         ap = int(state.get("ap", 0)); need = int(eff["ap_cost"])
         state["ap"] = max(0, ap - need)
@@ -70,80 +212,230 @@ def _effects_apply(state: Dict[str,Any], eff: Dict[str,Any]):
         except Exception:
             pass
 
-def _eligible(state: Dict[str,Any], node: Dict[str,Any]) -> bool:
-    flags = state.setdefault("flags", {})
-    for f in node.get("require_flags", []):
-        if not flags.get(f): return False
-    for f in node.get("forbid_flags", []):
-        if flags.get(f): return False
-    if "require_ap" in node and state.get("ap",0) < int(node["require_ap"]):
+class ChoiceMenu:
+    """非阻塞的選項選單：handle_event 處理按鍵，done 後 selected 是選中的 Choice（取消為 None）。"""
+    def __init__(self, choices: Tuple[Choice, ...], state: Dict[str,Any], size=(WIDTH, HEIGHT)):
+        self.state = state
+        # 選單期間旗標不會變：條件在進入時以位元運算判定一次
+        bits, ap = flag_bits(state), int(state.get("ap", 0))
+        self.visible = [ch for ch in choices if ch.cond.ok(bits, ap)]
+        self.selected: Optional[Choice] = None
+        self.done = not self.visible
+        font = get_font("text", 24)
+        w, h = size
+        panel = pygame.Rect(int(w*0.15), int(h*0.25), int(w*0.7), int(h*0.5))
+        self.options = ListView([ch.text for ch in self.visible], (panel.x+20, panel.y+44), (panel.w-24, 26), step=30,
+                                wrap=panel.w-40, line_height=28, bg=(24,24,30), color=(235,235,235), font=font)
+        self.menu = Menu(self.options, bg=None, panels=[(panel, (24,24,30))],
+                         texts=[("選擇：", (panel.x+16, panel.y+16), (230,230,180))], font=font)
+
+    def handle_event(self, e) -> bool:
+        if self.done:
+            return False
+        if e.type == pygame.QUIT:
+            self.done = True
+            return False
+        if e.type == pygame.KEYDOWN:
+            if self.options.handle_nav(e):
+                return True
+            if e.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_SPACE):
+                self.selected = self.visible[self.options.sel]
+                self.done = True
+                return True
+            if e.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+                self.done = True
+                return True
         return False
-    return True
 
-def _choice_menu(screen, choices: List[Dict[str,Any]], state: Dict[str,Any]) -> Optional[Dict[str,Any]]:
-    WIDTH = screen.get_width(); HEIGHT = screen.get_height()
-    font = pygame.font.SysFont(None, 24)
-    sel = 0
+    def invalidate(self) -> None:
+        self.menu.invalidate()
+
+    def present(self, screen) -> None:
+        self.menu.present(screen, self.state)
+
+def _choice_menu(screen, choices: Tuple[Choice, ...], state: Dict[str,Any]) -> Optional[Choice]:
+    menu = ChoiceMenu(choices, state, screen.get_size())
     clk = pygame.time.Clock()
-    while True:
-        panel = pygame.Surface((int(WIDTH*0.7), int(HEIGHT*0.5)))
-        panel.fill((24,24,30))
-        pygame.draw.rect(panel, (0,0,0), panel.get_rect(), 2)
-        y = 16
-        title = font.render("選擇：", True, (230,230,180))
-        panel.blit(title,(16,y)); y += 28
-        visible = [ch for ch in choices if _eligible(state, ch)]
-        if not visible:
-            return None
-        for i,ch in enumerate(visible):
-            txt = ch.get("text","(無)")
-            if i==sel:
-                pygame.draw.rect(panel, (60,60,90), pygame.Rect(12, y-4, panel.get_width()-24, 26))
-            img = font.render(txt, True, (235,235,235))
-            panel.blit(img,(20,y)); y += 30
-        screen.blit(panel, (int(WIDTH*0.15), int(HEIGHT*0.25)))
-        pygame.display.flip()
+    while not menu.done:
+        menu.present(screen)
         for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                return None
-            if e.type == pygame.KEYDOWN:
-                if e.key in (pygame.K_UP, pygame.K_w): sel = (sel-1) % len(visible)
-                elif e.key in (pygame.K_DOWN, pygame.K_s): sel = (sel+1) % len(visible)
-                elif e.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_SPACE):
-                    return visible[sel]
-                elif e.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-                    return None
+            menu.handle_event(e)
         clk.tick(60)
+    return menu.selected
 
-def run_flow(screen, state: Dict[str,Any], flow_id: str) -> str:
-    flow = load_flow(flow_id)
-    key = flow.get("start")
-    visited = 0
-    while key:
-        node = flow["nodes"].get(key, {})
-        did = node.get("dialogue")
-        if did:
-            try:
-                run_dialogue(screen, did, state=state)
-            except Exception:
-                run_lines(screen, [{"speaker":"系統","text":f"(缺少對話 {did})"}], state=state)
-        for eff in node.get("effects", []):
-            _effects_apply(state, eff)
-        if node.get("move_to"):
-            state["current"] = node["move_to"]
-            return key
-        if node.get("choices"):
-            sel = _choice_menu(screen, node["choices"], state)
-            if sel is None:
-                break
-            for eff in sel.get("effects", []):
-                _effects_apply(state, eff)
-            key = sel.get("next")
+# ---- 可續播的劇情執行 ----
+# FlowRunner 把劇情跑在一個 generator 裡：每幀 update() 推進一次，停在對話的每一行與每個選單。
+# 進度記在 state["flow"] = {"id", "node", "line"}，line 為 CHOICE_LINE 表示停在該節點的選單
+# （對話與節點效果都已經套用）。存檔帶著這筆紀錄，讀檔後從同一節點、同一行接著播，不重播前面的節點。
+CHOICE_LINE = -1
+_RUN_IDS = count(1)
+
+class FlowRunner:
+    def __init__(self, state: Dict[str,Any], flow_id: str, node: Optional[str] = None, line: int = 0,
+                 size=(WIDTH, HEIGHT)):
+        self.state = state
+        self.flow = get_flow(flow_id)
+        self.size = size
+        self.player = None            # 目前的 DialoguePlayer
+        self.choice: Optional[ChoiceMenu] = None
+        self._shown = None            # 已整幀 flip 過的對話框
+        self.done = False
+        self.result: Optional[str] = None
+        self.quit = False             # 因 QUIT 中斷；state["flow"] 保留，之後可續播
+        start = self.flow.index.get(node, self.flow.start) if node else self.flow.start
+        self._group = f"flow:{self.flow.id}:{next(_RUN_IDS)}"   # 這次播放的預取群組
+        prefetch_flow(state, self.flow, self._group)
+        self._gen = self._run(start, line if node else 0)
+
+    @classmethod
+    def resume(cls, state: Dict[str,Any], **kw) -> Optional["FlowRunner"]:
+        """依 state["flow"] 的紀錄接著播；沒有紀錄或劇情檔不見時回傳 None。"""
+        rec = state.get("flow")
+        if not rec:
+            return None
+        try:
+            return cls(state, rec["id"], rec.get("node"), int(rec.get("line", 0)), **kw)
+        except (KeyError, OSError, ValueError):
+            state.pop("flow", None)
+            return None
+
+    def _record(self, key: str, line: int) -> None:
+        self.state["flow"] = {"id": self.flow.id, "node": key, "line": line}
+
+    def _finish(self, result: str) -> None:
+        drop_flow_prefetch(self._group)
+        self.state.pop("flow", None)
+        self.player = self.choice = None
+        self.done = True
+        self.result = result
+
+    def _play(self, node: Node, line: int):
+        did = node.dialogue
+        if DialoguePlayer is None:
+            run_dialogue(pygame.display.get_surface(), did, state=self.state)
+            return
+        try:
+            player = DialoguePlayer.from_id(did, state=self.state)
+        except Exception:
+            player = DialoguePlayer.from_lines([{"speaker":"系統","text":f"(缺少對話 {did})"}], state=self.state)
+        player.seek(line)
+        self.player = player
+        while not player.done:
+            self._record(node.key, player.idx)
+            yield
+        self.player = None
+
+    def _choose(self, node: Node):
+        self._record(node.key, CHOICE_LINE)
+        self.choice = ChoiceMenu(node.choices, self.state, self.size)
+        while not self.choice.done:
+            yield
+        sel, self.choice = self.choice.selected, None
+        return sel
+
+    def _run(self, i: int, line: int):
+        visited = 0
+        while i >= 0:
+            node = self.flow.nodes[i]
+            if line != CHOICE_LINE:
+                if node.dialogue:
+                    yield from self._play(node, line)
+                for eff in node.effects:
+                    _effects_apply(self.state, eff)
+                if node.move_to:
+                    self.state["current"] = node.move_to
+                    self._finish(node.key)
+                    return
+            line = 0
+            if node.choices:
+                sel = yield from self._choose(node)
+                if sel is None:
+                    break
+                for eff in sel.effects:
+                    _effects_apply(self.state, eff)
+                i = sel.next
+                visited += 1
+                continue
+            i = node.next
             visited += 1
-            continue
-        key = node.get("next")
-        visited += 1
-        if visited > 999:
+            if visited > 999:
+                break
+        push_note(self.state, f"劇情完成：{self.flow.title}")
+        self._finish("END")
+
+    # ---- 每幀（宿主迴圈呼叫） ----
+    def handle_event(self, event) -> bool:
+        if self.done:
+            return False
+        if event.type == pygame.QUIT:
+            # 中斷但保留進度紀錄，存檔後可續播
+            self.quit = self.done = True
+            drop_flow_prefetch(self._group)
+            return False
+        widget = self.player or self.choice
+        return widget.handle_event(event) if widget is not None else False
+
+    def update(self, dt: float) -> bool:
+        """推進一幀：更新打字機，目前的對話或選單結束時讓劇情往下走到下一個停點。"""
+        if self.done:
+            return True
+        if self.player is not None:
+            self.player.update(dt)
+        try:
+            next(self._gen)
+        except StopIteration:
+            pass
+        return self.done
+
+    def idle(self) -> bool:
+        """沒有動畫在跑，宿主可以睡到下一個事件。"""
+        return self.choice is not None or (self.player is not None and not self.player.animating())
+
+    def invalidate(self) -> None:
+        self._shown = None
+        if self.choice is not None:
+            self.choice.invalidate()
+
+    def present(self, screen) -> None:
+        """畫出變動的部分並送上螢幕：新的對話框先整幀 flip（HUD 一起上屏），之後只更新框的區域。"""
+        if self.player is not None:
+            if self.player is not self._shown:
+                self.player.draw(screen)
+                pygame.display.flip()
+                self._shown = self.player
+            elif self.player.needs_redraw():
+                self.player.draw(screen)
+                pygame.display.update(self.player.box_rect)
+        elif self.choice is not None:
+            self.choice.present(screen)
+
+def start_flow(state: Dict[str,Any], flow_id: str) -> None:
+    """排定一段劇情，交給主迴圈逐幀播放。"""
+    state["flow"] = {"id": flow_id, "node": None, "line": 0}
+
+def run_flow(screen, state: Dict[str,Any], flow_id: str, resume: bool = False) -> str:
+    """阻塞版：在自己的迴圈裡播到結束。視窗被關閉時重新送出 QUIT 讓外層場景處理。
+    resume 時若 state["flow"] 記著同一段劇情的進度，就從該節點、該行接著播。"""
+    rec = state.get("flow") if resume else None
+    runner = FlowRunner.resume(state, size=screen.get_size()) if rec and rec.get("id") == flow_id else None
+    if runner is None:
+        runner = FlowRunner(state, flow_id, size=screen.get_size())
+    clock = pygame.time.Clock()
+    dt = 0.0
+    while not runner.done:
+        runner.update(dt)
+        if runner.done:
             break
-    push_note(state, f"劇情完成：{flow.get('title',flow_id)}")
-    return "END"
+        runner.present(screen)
+        if runner.idle():
+            first = pygame.event.wait(DIALOGUE_IDLE_WAIT_MS)
+            events = ([first] if first.type != pygame.NOEVENT else []) + pygame.event.get()
+        else:
+            events = pygame.event.get()
+        for e in events:
+            runner.handle_event(e)
+        dt = clock.tick(60) / 1000.0
+    if runner.quit:
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        return "QUIT"
+    return runner.result
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# 圖集建置：依 atlas_config.json 切割來源大圖，並把 assets/images/*.png 一起打包。
+# 相同格子尺寸的圖放進同一張圖集（assets/atlas/atlas_<w>x<h>.png），
+# 每張圖集配一份與 tileset_index_pixel.json 相同格式的索引（name -> [cx, cy]），
+# 最後寫出 manifest.json 供 core/atlas.py 讀取。
+#
+# 用法：python core/tools/build_atlas.py [專案根目錄]
+from pathlib import Path
+import json, math, os, sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+def load_json(p: Path):
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def slice_sheet(root: Path, src: dict):
+    """把一張來源大圖切成 (name, Surface)；名稱為 prefix_r{row}_c{col}。"""
+    path = root / src["path"]
+    if not path.exists():
+        print("[SKIP]", path, "(不存在)")
+        return []
+    sheet = pygame.image.load(str(path))
+    tw, th = int(src["tile_w"]), int(src["tile_h"])
+    margin, spacing = int(src.get("margin", 0)), int(src.get("spacing", 0))
+    prefix = src.get("prefix") or path.stem
+    out = []
+    r, y = 0, margin
+    while y + th <= sheet.get_height() - margin:
+        c, x = 0, margin
+        while x + tw <= sheet.get_width() - margin:
+            tile = sheet.subsurface((x, y, tw, th)).copy()
+            # 全透明的格子不打包
+            if tile.get_bounding_rect().width > 0:
+                out.append((f"{prefix}_r{r}_c{c}", tile))
+            c += 1; x += tw + spacing
+        r += 1; y += th + spacing
+    return out
+
+def loose_images(root: Path):
+    out = []
+    for p in sorted((root / "assets" / "images").glob("*.png")):
+        try:
+            out.append((p.relative_to(root).as_posix(), pygame.image.load(str(p))))
+        except Exception as e:
+            print("[ERR]", p, e)
+    return out
+
+def pack(entries, out_dir: Path):
+    """依尺寸分組打包，回傳 manifest 的 atlases 清單。"""
+    groups = {}
+    for name, surf in entries:
+        groups.setdefault(surf.get_size(), []).append((name, surf))
+    atlases = []
+    for (tw, th), items in sorted(groups.items()):
+        cols = max(1, math.ceil(math.sqrt(len(items))))
+        rows = math.ceil(len(items) / cols)
+        sheet = pygame.Surface((cols * tw, rows * th), pygame.SRCALPHA)
+        sheet.fill((0, 0, 0, 0))
+        index = {}
+        for i, (name, surf) in enumerate(items):
+            cx, cy = i % cols, i // cols
+            sheet.blit(surf, (cx * tw, cy * th))
+            index[name] = [cx, cy]
+        stem = f"atlas_{tw}x{th}"
+        pygame.image.save(sheet, str(out_dir / f"{stem}.png"))
+        (out_dir / f"{stem}.json").write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+        atlases.append({"image": f"{stem}.png", "index": f"{stem}.json", "tile_w": tw, "tile_h": th})
+        print("[OK]", stem, f"{len(items)} 張")
+    return atlases
+
+def main():
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+    pygame.init()
+    entries = []
+    cfg_path = root / "atlas_config.json"
+    if cfg_path.exists():
+        for src in load_json(cfg_path).get("sources", []):
+            entries.extend(slice_sheet(root, src))
+    entries.extend(loose_images(root))
+    out_dir = root / "assets" / "atlas"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"atlases": pack(entries, out_dir)}
+    # manifest 最後寫入：其修改時間即圖集建置時間
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    print("[OK]", out_dir / "manifest.json")
+
+if __name__ == "__main__":
+    main()
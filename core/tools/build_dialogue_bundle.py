@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# 對話包建置：把 data/dialogues/*.json 打包成 data/dialogues.bundle，
+# 執行期由 core/dialogue_bundle.py 以 mmap 讀取、按需解碼。
+#
+# 用法：python core/tools/build_dialogue_bundle.py [專案根目錄]
+from pathlib import Path
+import json, sys
+
+def collect(root: Path):
+    out = []
+    for p in sorted((root / "data" / "dialogues").glob("*.json")):
+        if p.stem.startswith("_"):
+            continue   # 底線開頭的是執行期暫存檔
+        try:
+            out.append((p.stem, json.loads(p.read_text(encoding="utf-8"))))
+        except Exception as e:
+            print("[ERR]", p, e)
+    return out
+
+def main():
+    root = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else Path(".").resolve()
+    sys.path.insert(0, str(root))
+    from core.dialogue_bundle import BUNDLE_PATH, write_bundle
+    n = write_bundle(BUNDLE_PATH, collect(root))
+    print("[OK]", BUNDLE_PATH, f"{n} 筆")
+
+if __name__ == "__main__":
+    main()
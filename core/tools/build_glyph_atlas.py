@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# 字形圖集建置：從遊戲自己的文字（data/dialogues、data/story、data/npcs.json、
+# scenes/story_scene.py 的字串常值）收集出現過的字，每個字級各渲染一次成白色字形圖集，
+# 輸出 assets/glyphs/glyphs_<size>.png + .json，供 core/glyphs.py 在執行期拼字。
+#
+# 用法：python core/tools/build_glyph_atlas.py [專案根目錄]
+from pathlib import Path
+import ast, json, os, sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+SHEET_WIDTH = 1024
+
+def _strings(obj):
+    """JSON 裡所有字串值（不含 key）。"""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _strings(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _strings(v)
+
+def collect_corpus(root: Path) -> set:
+    chars = set()
+    files = sorted((root / "data" / "dialogues").glob("*.json")) + sorted((root / "data" / "story").glob("*.json"))
+    files.append(root / "data" / "npcs.json")
+    for p in files:
+        if not p.exists():
+            continue
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except Exception as e:
+            print("[ERR]", p, e); continue
+        for s in _strings(data):
+            chars.update(s)
+    # DialogNode 等寫在程式裡的劇情
+    story = root / "scenes" / "story_scene.py"
+    if story.exists():
+        for node in ast.walk(ast.parse(story.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                chars.update(node.value)
+    # 英數字有字距調整，執行期整段交給 font.render，不收進圖集
+    return {c for c in chars if c.isprintable() and not c.isascii()}
+
+def build_sheet(font, chars):
+    """shelf 排列：每個字形寬度為其 advance、高度為行高。"""
+    height = font.get_height()
+    glyphs, placed = {}, []
+    x = y = 0
+    for ch in sorted(chars):
+        img = font.render(ch, True, (255, 255, 255))
+        w = img.get_width()
+        if w == 0:
+            continue
+        if x + w > SHEET_WIDTH:
+            x, y = 0, y + height
+        glyphs[ch] = [x, y, w, height]
+        placed.append((img, (x, y)))
+        x += w
+    sheet = pygame.Surface((SHEET_WIDTH, y + height), pygame.SRCALPHA)
+    for img, pos in placed:
+        sheet.blit(img, pos)
+    return sheet, glyphs
+
+def main():
+    root = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else Path(".").resolve()
+    sys.path.insert(0, str(root))
+    pygame.init()
+    from core.config import GLYPH_ATLAS_SIZES
+    from core.fonts import TEXT, font_path, get_font
+    from core.glyphs import GLYPH_DIR
+    chars = collect_corpus(root)
+    GLYPH_DIR.mkdir(parents=True, exist_ok=True)
+    for size in GLYPH_ATLAS_SIZES:
+        font = get_font(TEXT, size)
+        sheet, glyphs = build_sheet(font, chars)
+        pygame.image.save(sheet, str(GLYPH_DIR / f"glyphs_{size}.png"))
+        meta = {"font": font_path(), "size": size, "height": font.get_height(), "glyphs": glyphs}
+        (GLYPH_DIR / f"glyphs_{size}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        print("[OK]", GLYPH_DIR / f"glyphs_{size}.png", f"{len(glyphs)} 字", sheet.get_size())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# 精靈庫建置：把散圖（原尺寸）以及遊戲實際會用到的縮放版本打包成 assets/sprites.bank，
+# 執行期由 core/sprite_bank.py 以 mmap 零複製讀取。
+#
+# 用法：python core/tools/build_sprite_bank.py [專案根目錄]
+from pathlib import Path
+import json, os, sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+def _scale(img, size, smooth):
+    if img.get_size() == tuple(size):
+        return img
+    return (pygame.transform.smoothscale if smooth else pygame.transform.scale)(img, size)
+
+def collect(root: Path):
+    from core.assets import ASSET_TABLE, ASSET_DIR
+    from core.config import DIALOGUE_PORTRAIT_SIZE
+    from core.sprite_bank import bank_name
+    from scenes.battle_grid import CELL_SIZE
+    cell = (CELL_SIZE, CELL_SIZE)
+    out = []
+
+    def add(path, size=None, smooth=True):
+        try:
+            img = pygame.image.load(str(path)).convert(32, pygame.SRCALPHA)
+        except Exception as e:
+            print("[ERR]", path, e); return
+        out.append((bank_name(path), img))
+        if size:
+            out.append((bank_name(path, size, smooth), _scale(img, size, smooth)))
+
+    # load_assets() 用到的尺寸
+    for name, _, size in ASSET_TABLE.values():
+        add(os.path.join(ASSET_DIR, name), size)
+    # 戰鬥角色圖（最近鄰縮放到格子大小）
+    for p in sorted((root / "assets" / "characters").glob("*.png")):
+        add(p, cell, False)
+    # 對話立繪
+    for p in sorted((root / "assets" / "portraits").glob("*.png")):
+        add(p, DIALOGUE_PORTRAIT_SIZE)
+    # tileset 格子
+    tileset = root / "assets" / "tileset_pixel.png"
+    index_path = root / "assets" / "tileset_index_pixel.json"
+    if tileset.exists() and index_path.exists():
+        sheet = pygame.image.load(str(tileset)).convert(32, pygame.SRCALPHA)
+        for cx, cy in json.loads(index_path.read_text(encoding="utf-8")).values():
+            rect = (cx * 64, cy * 64, 64, 64)
+            out.append((bank_name(tileset, cell, False, rect), _scale(sheet.subsurface(rect), cell, False)))
+    # 同名去重（同一張圖可能被列兩次）
+    return list(dict(out).items())
+
+def main():
+    root = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else Path(".").resolve()
+    sys.path.insert(0, str(root))
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    from core.sprite_bank import BANK_PATH, write_bank
+    from core.disk_cache import display_format
+    n = write_bank(BANK_PATH, collect(root), display_format())
+    print("[OK]", BANK_PATH, f"{n} 張")
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,341 @@
 # project/core/ui.py
-import os
+from collections import OrderedDict
+from functools import lru_cache
 import pygame
-from core.resource import proj_path
 from core.config import COLOR
+from core.fonts import TEXT, get_font, set_font_path
+from core import glyphs
+try:
+    from core.config import TEXT_CACHE_MAX_ENTRIES, TEXT_CACHE_MAX_BYTES
+except Exception:
+    TEXT_CACHE_MAX_ENTRIES = 512
+    TEXT_CACHE_MAX_BYTES = 8 * 1024 * 1024
 
 _FONT = None
 _FONT_S = None
 
-# 在這裡列出你優先想用的中文字體名稱（系統字體）
-_CJK_CANDIDATES = [
-    "Noto Sans CJK TC",
-    "Noto Sans TC",
-    "Microsoft JhengHei",
-    "PingFang TC",
-    "PingFang SC",
-    "Heiti TC",
-    "WenQuanYi Zen Hei",
-    "SimHei",
-    "Arial Unicode MS",
-    "font"
-]
-
-# 專案內的字體路徑（請把 TTF/OTF 丟到這裡）
-_PROJECT_FONT_DIR = str(proj_path("assets","fonts"))
-_PROJECT_FONT_FILES = [
-    "NotoSansTC-Regular.otf",
-    "NotoSansTC-Regular.ttf",
-    "Microsoft JhengHei.ttf",
-    "PingFang.ttc",
-    "WenQuanYi Zen Hei.ttf",
-    "font.ttf"
-]
-
-def _find_cjk_font_path():
-    """優先找系統字體，找不到再用 assets/fonts/ 裡的檔案。"""
-    # 1) 系統字體
-    for name in _CJK_CANDIDATES:
-        try:
-            path = pygame.font.match_font(name)
-            if path:
-                return path
-        except Exception:
-            pass
-    # 2) 專案字體資料夾
-    if os.path.isdir(_PROJECT_FONT_DIR):
-        for f in _PROJECT_FONT_FILES:
-            p = os.path.join(_PROJECT_FONT_DIR, f)
-            if os.path.exists(p):
-                return p
-        # 若使用者放了不同檔名，也嘗試抓第一個 .ttf/.otf
-        for f in os.listdir(_PROJECT_FONT_DIR):
-            if f.lower().endswith((".ttf", ".otf", ".ttc")):
-                return os.path.join(_PROJECT_FONT_DIR, f)
-    return None  # 找不到就交給系統回退（可能不顯示中文）
-
-def init_fonts(size=20, small=16):
-    """請在 pygame.init() 後呼叫一次。"""
+def init_fonts(size=20, small=16, font_path=None):
+    """請在 pygame.init() 後呼叫一次。font_path 可由背景預先探測好後傳入（"" 表示找不到）。"""
     global _FONT, _FONT_S
     if _FONT is not None:
         return
-    # 確保 font 子系統啟動
-    if not pygame.font.get_init():
-        pygame.font.init()
-
-    font_path = _find_cjk_font_path()
-    try:
-        if font_path:
-            _FONT = pygame.font.Font(font_path, size)
-            _FONT_S = pygame.font.Font(font_path, small)
-        else:
-            # 萬一真的找不到，就用系統默認（可能無法顯示中文）
-            _FONT = pygame.font.SysFont("Arial", size)
-            _FONT_S = pygame.font.SysFont("Arial", small)
-    except Exception:
-        # 保底
-        _FONT = pygame.font.SysFont(None, size)
-        _FONT_S = pygame.font.SysFont(None, small)
+    if font_path is not None:
+        set_font_path(font_path)
+    _FONT = get_font(TEXT, size)
+    _FONT_S = get_font(TEXT, small)
 
-def draw_text(surface, txt, pos, color=COLOR["text"], small=False):
+class TextCache:
+    """已渲染文字的 LRU 快取：(文字, 字體, 字級, 顏色, 反鋸齒) -> Surface，以筆數與位元組數設上限。"""
+    def __init__(self, max_entries=TEXT_CACHE_MAX_ENTRIES, max_bytes=TEXT_CACHE_MAX_BYTES):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (text, font, font.get_height(), tuple(color), antialias)
+        ent = self._entries.get(key)
+        if ent is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ent[0]
+        self.misses += 1
+        img = glyphs.render(font, text, color, antialias)
+        size = img.get_pitch() * img.get_height()
+        self._entries[key] = (img, size)
+        self.bytes_used += size
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            _, (_, old) = self._entries.popitem(last=False)
+            self.bytes_used -= old
+            self.evictions += 1
+        return img
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+_TEXT_CACHE = TextCache()
+
+def get_text_cache():
+    return _TEXT_CACHE
+
+def render_text(font, txt, color=COLOR["text"], antialias=True):
+    """font.render 的快取版；每幀重畫的固定字串只需一次 blit。"""
+    return _TEXT_CACHE.render(font, str(txt), color, antialias)
+
+def ui_font(small=False):
+    """draw_text 使用的字體。"""
     # 懶載：若沒 init 也嘗試啟動（避免忘記呼叫 init_fonts）
-    global _FONT, _FONT_S
     if _FONT is None or _FONT_S is None:
         init_fonts()
-    font = _FONT_S if small else _FONT
-    img = font.render(str(txt), True, color)
-    surface.blit(img, pos)
\ No newline at end of file
+    return _FONT_S if small else _FONT
+
+def draw_text(surface, txt, pos, color=COLOR["text"], small=False):
+    surface.blit(render_text(ui_font(small), txt, color), pos)
+
+# ---- 換行排版 ----
+# 不可放在行首的標點（放不下時懸掛在上一行行尾）
+_NO_LINE_START = frozenset("，。、！？；：）」』】》〉〕…—～・％,.!?;:)]}%")
+# 不可放在行尾的標點（連同下一個字一起換到下一行）
+_NO_LINE_END = frozenset("（「『【《〈〔([{“‘")
+
+def _is_word_char(ch):
+    return ch.isascii() and not ch.isspace()
+
+def _break_units(text):
+    """斷行單位：英數字連續成一個字，其餘（中日韓文字、標點、空白）一字一個。
+    英文字前後的禁則標點（例如 "(word)," 的括號與逗號）拆成獨立單位，讓禁則能套用；
+    字中間的（3.14、e-mail）不拆。"""
+    units = []
+    i, n = 0, len(text)
+    while i < n:
+        j = i + 1
+        if _is_word_char(text[i]):
+            while j < n and _is_word_char(text[j]):
+                j += 1
+            a, b = i, j
+            while a < b and text[a] in _NO_LINE_END:
+                units.append((a, a + 1)); a += 1
+            tail = b
+            while tail > a and text[tail - 1] in _NO_LINE_START:
+                tail -= 1
+            if tail > a:
+                units.append((a, tail))
+            units.extend((k, k + 1) for k in range(tail, b))
+        else:
+            units.append((i, j))
+        i = j
+    return units
+
+@lru_cache(maxsize=1024)
+def layout_text(text, font, width):
+    """依像素寬度把中英混排文字斷行，回傳每行在 text 中的 (起, 迄)。
+    英文以字為單位、中文逐字；遵守行首/行尾禁則，"\n" 強制換行，行首行尾空白不計。"""
+    lines = []
+    units = _break_units(text)
+    start = end = 0
+    k = 0
+    while k < len(units):
+        a, b = units[k]
+        k += 1
+        ch = text[a]
+        if ch == "\n":
+            lines.append((start, end))
+            start = end = b
+            continue
+        if ch.isspace():
+            if end == start:
+                start = end = b
+            continue
+        if font.size(text[start:b])[0] <= width or (ch in _NO_LINE_START and end > start):
+            end = b
+            continue
+        if end == start:
+            if b - a > 1:
+                # 單字比整行還寬：拆成單一字元
+                units[k - 1:k] = [(i, i + 1) for i in range(a, b)]
+                k -= 1
+            else:
+                end = b
+            continue
+        brk = end - 1 if end - 1 > start and text[end - 1] in _NO_LINE_END else end
+        lines.append((start, brk))
+        start = brk if brk < end else a
+        end = end if brk < end else a
+        k -= 1
+    if end > start or not lines:
+        lines.append((start, end))
+    return tuple(lines)
+
+def wrap_lines(text, font, width):
+    """layout_text 的字串版本。"""
+    text = str(text)
+    return [text[a:b] for a, b in layout_text(text, font, width)]
+
+# ---- 保留模式選單 ----
+# 選項文字只渲染一次並留著 Surface；選取或焦點改變時只重畫受影響的列，draw() 回傳髒矩形，
+# 由 Menu.present() 以 pygame.display.update(rects) 送上螢幕。
+
+class ListView:
+    """一組選項（直排或橫排）。items 的每一項是字串，或多欄時的字串 tuple（對應 columns 的 x 位移）。
+    pos 是第一項文字的位置；size 是選取底色的大小，pad 是底色相對文字往左上延伸的距離。
+    wrap 給寬度時長選項自動換行，該列的高度隨行數（每行 line_height）增加。"""
+    def __init__(self, items, pos, size, *, step=36, horizontal=False, columns=(0,), pad=(8, 4),
+                 wrap=None, line_height=28, sel=0, active=True, bg=(16, 18, 22), highlight=(60, 60, 90),
+                 color=COLOR["text"], font=None):
+        self.pos = pos
+        self.size = size
+        self.step = step
+        self.horizontal = horizontal
+        self.columns = columns
+        self.pad = pad
+        self.wrap = wrap
+        self.line_height = line_height
+        self.active = active
+        self.bg = bg
+        self.highlight = highlight
+        self.color = color
+        self.font = font
+        self.sel = 0
+        self.set_items(items, sel)
+
+    def set_items(self, items, sel=None):
+        self.items = list(items)
+        self.sel = (self.sel if sel is None else sel) % len(self.items) if self.items else 0
+        self._rows = None
+        self._dirty = set()
+        self._full = True
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build(self):
+        font = self.font or ui_font()
+        x, y = self.pos
+        rows = []
+        for item in self.items:
+            cols = item if isinstance(item, tuple) else (item,)
+            pieces, nlines = [], 1
+            for dx, txt in zip(self.columns, cols):
+                txt = str(txt)
+                spans = layout_text(txt, font, self.wrap) if self.wrap else ((0, len(txt)),)
+                nlines = max(nlines, len(spans))
+                for k, (a, b) in enumerate(spans):
+                    pieces.append((render_text(font, txt[a:b], self.color), (x + dx, y + k * self.line_height)))
+            extra = self.line_height * (nlines - 1)
+            rect = pygame.Rect(x - self.pad[0], y - self.pad[1], self.size[0], self.size[1] + extra)
+            rows.append((rect, pieces))
+            if self.horizontal:
+                x += self.step
+            else:
+                y += self.step + extra
+        return rows
+
+    @property
+    def rects(self):
+        if self._rows is None:
+            self._rows = self._build()
+        return [rect for rect, _ in self._rows]
+
+    def select(self, i):
+        if not self.items:
+            return
+        i %= len(self.items)
+        if i != self.sel:
+            self._dirty.update((self.sel, i))
+            self.sel = i
+
+    def move(self, delta):
+        self.select(self.sel + delta)
+
+    def set_active(self, active):
+        if active != self.active:
+            self.active = active
+            self._dirty.add(self.sel)
+
+    def handle_nav(self, event):
+        """方向鍵移動選取（橫排用左右、直排用上下）；有處理時回傳 True。"""
+        if event.type != pygame.KEYDOWN or not self.items:
+            return False
+        back, fwd = ((pygame.K_LEFT, pygame.K_a), (pygame.K_RIGHT, pygame.K_d)) if self.horizontal \
+            else ((pygame.K_UP, pygame.K_w), (pygame.K_DOWN, pygame.K_s))
+        if event.key in back:
+            self.move(-1)
+        elif event.key in fwd:
+            self.move(1)
+        else:
+            return False
+        return True
+
+    def invalidate(self):
+        self._full = True
+
+    def _draw_row(self, surface, i, clear):
+        rect, pieces = self._rows[i]
+        if clear:
+            # 只重畫這一列：先以底色蓋掉舊的選取底色，超出列範圍的文字不動
+            surface.set_clip(rect)
+            surface.fill(self.bg, rect)
+        if i == self.sel and self.active:
+            pygame.draw.rect(surface, self.highlight, rect)
+        for img, p in pieces:
+            surface.blit(img, p)
+        if clear:
+            surface.set_clip(None)
+        return rect
+
+    def draw(self, surface, full=False):
+        """畫出需要更新的列，回傳它們的矩形；full 或剛 invalidate 時畫全部（假設底已清好）。"""
+        if self._rows is None:
+            self._rows = self._build()
+        if full or self._full:
+            rects = [self._draw_row(surface, i, False) for i in range(len(self._rows))]
+        else:
+            rects = [self._draw_row(surface, i, True) for i in sorted(self._dirty) if i < len(self._rows)]
+        self._full = False
+        self._dirty.clear()
+        return rects
+
+class Menu:
+    """整個選單畫面：底色、面板、固定文字只在整幀重畫時畫一次，之後只更新 ListView 有變動的列。
+    bg 為 None 時不清畫面（疊在既有畫面上的選單）；panels 是 (矩形, 底色) 清單，會加上黑框。
+    texts 是 (文字, 位置, 顏色) 清單。"""
+    def __init__(self, views, *, bg=(16, 18, 22), panels=(), texts=(), font=None):
+        self.views = list(views) if isinstance(views, (list, tuple)) else [views]
+        self.bg = bg
+        self.panels = list(panels)
+        self.texts = list(texts)
+        self.font = font
+        self._full = True
+        self._had_notes = False
+
+    def invalidate(self):
+        """畫面被其他東西（對話、其他場景）蓋過時呼叫，下一次整幀重畫。"""
+        self._full = True
+
+    def draw(self, surface):
+        if not self._full:
+            rects = []
+            for view in self.views:
+                rects.extend(view.draw(surface))
+            return rects
+        if self.bg is not None:
+            surface.fill(self.bg)
+        for rect, fill in self.panels:
+            pygame.draw.rect(surface, fill, rect)
+            pygame.draw.rect(surface, (0, 0, 0), rect, 2)
+        font = self.font or ui_font()
+        for txt, pos, color in self.texts:
+            surface.blit(render_text(font, txt, color), pos)
+        for view in self.views:
+            view.draw(surface, full=True)
+        self._full = False
+        return [surface.get_rect()]
+
+    def present(self, surface, state=None):
+        """畫出變動並送上螢幕：整幀重畫時 flip（HUD 跟著重畫），否則只 update 髒矩形。
+        有 HUD 通知（或通知剛消失）時每幀整幀重畫，讓通知能正常淡出。"""
+        notes = bool(state and state.get("ui", {}).get("notes"))
+        if notes or self._had_notes:
+            self._full = True
+        self._had_notes = notes
+        full = self._full
+        rects = self.draw(surface)
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
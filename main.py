@@ -1,10 +1,13 @@
-from core.save import save_state, load_state
+from core.save import save_state, load_state, save_autosave
 from core.overlay_hook import install_flip_hook, push_note
 import pygame, sys
 from core.config import WIDTH, HEIGHT, FPS
-from core.assets import load_assets
+from core.assets import load_assets, startup_image_requests
+from core.asset_manager import get_asset_manager
+from core.preload import AssetPreloader, run_loading_screen
 from core.models import build_initial_state
 from core.ui import init_fonts
+from core.fonts import resolve_font_path
 from scenes.menu import build as build_menu, loop as menu_loop
 from scenes.campus import build as build_campus, loop as campus_loop
 from scenes.mind_hub import build as build_mind_hub, loop as mind_hub_loop
@@ -12,10 +15,12 @@ from scenes.story_scene import build as build_story, loop as story_loop
 from scenes.dream_trial import build as build_dream, loop as dream_loop
 from core.progression import ensure_progression_state, end_day, ap_left, spend_ap
 from core.emotions import ensure_emotions
+from core.storyflow import FlowRunner
 HAS_STORY = True
 # 可選戰鬥
 try:
     from scenes.battle_grid import build as build_battle_grid, loop as battle_grid_loop
+    from scenes.battle_grid import preload_requests as battle_grid_preload_requests
     HAS_BATTLE_GRID = True
 except Exception:
     HAS_BATTLE_GRID = False
@@ -34,7 +39,15 @@ def main():
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("心靈之域")
     clock = pygame.time.Clock()
-    init_fonts()
+    # 背景解碼圖片與探測字體，載入畫面維持完整幀率
+    preloader = AssetPreloader()
+    get_asset_manager().preloader = preloader
+    preloader.submit_task("cjk_font", resolve_font_path)
+    preloader.submit_many(startup_image_requests())
+    if HAS_BATTLE_GRID:
+        preloader.submit_many(battle_grid_preload_requests())
+    run_loading_screen(screen, preloader, clock)
+    init_fonts(font_path=preloader.task_result("cjk_font") or "")
     assets = load_assets()
 
     state = build_initial_state(assets)
@@ -54,9 +67,34 @@ def main():
     # 初始當前場景
     state["current"] = "menu"
 
+    manager = get_asset_manager()
+    prev = None
+    runner = None
     while True:
         clock.tick(FPS)
+        # 進行中（或讀檔帶回來）的劇情：主迴圈每輪推進一幀，播完才回到場景分發
+        if runner is None and state.get("flow"):
+            runner = FlowRunner.resume(state, size=screen.get_size())
+        if runner is not None:
+            runner.update(clock.get_time() / 1000.0)
+            if not runner.done:
+                runner.present(screen)
+                for event in pygame.event.get():
+                    runner.handle_event(event)
+            if runner.quit:
+                save_autosave(state)   # 保留劇情進度（自動存檔，不動手動存檔），下次繼續時從同一節點、同一行續播
+                pygame.quit(); sys.exit()
+            if not runner.done:
+                continue
+            runner = None
         cur = state["current"]
+        if cur != prev:
+            # 換場景：上一個場景放掉它持有的圖片，新場景載入的圖片釘在新場景
+            scene = state["scenes"].get(prev)
+            if hasattr(scene, "release_assets"):
+                scene.release_assets()
+            manager.enter_scope(cur)
+            prev = cur
         # 依場景型別分發
         if cur == "menu":
             menu_loop(screen, state)
@@ -10,6 +10,8 @@ from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass, field
 from copy import deepcopy
 from core.dialogue import run_dialogue
+from core.asset_manager import get_asset_manager
+from core.fonts import get_font
 
 try:
     from core.config import WIDTH, HEIGHT
@@ -355,6 +357,27 @@ class BattleGrid:
         
         return False
 
+CHARACTER_ELEMENTS = ["wind", "fire", "water", "earth", "wood", "shadow",
+                      "light", "chaos", "metal", "mist", "dream", "law"]
+
+CELL_SIZE = 50
+
+def preload_requests() -> List[tuple]:
+    """_load_sprites 會用到的 (路徑, 尺寸, smooth)，供啟動時背景預載。"""
+    # tileset 不預載：格子按需從精靈庫 / 磁碟快取取得，真的缺格子時 load_region 才解碼整張圖
+    cell = (CELL_SIZE, CELL_SIZE)
+    requests = []
+    characters_folder = os.path.join("assets", "characters")
+    try:
+        present = set(os.listdir(characters_folder))
+    except OSError:
+        return requests
+    for char_name in CHARACTER_ELEMENTS:
+        for fname in [f"{char_name}_{frame}.png" for frame in range(4)] + [f"{char_name}.png"]:
+            if fname in present:
+                requests.append((os.path.join(characters_folder, fname), cell, False))
+    return requests
+
 class TacticalBattleScene:
     """戰術戰鬥場景"""
     
@@ -364,7 +387,7 @@ class TacticalBattleScene:
         self.grid = BattleGrid()
         
         # 視覺設定
-        self.cell_size = 50
+        self.cell_size = CELL_SIZE
         self.grid_offset_x = 50
         self.grid_offset_y = 150
         
@@ -394,14 +417,9 @@ class TacticalBattleScene:
         self.skill_range: List[Position] = []
         
         # 字體
-        try:
-            self.font = pygame.font.SysFont("Microsoft JhengHei", 14)
-            self.big_font = pygame.font.SysFont("Microsoft JhengHei", 20)
-            self.small_font = pygame.font.SysFont("Microsoft JhengHei", 12)
-        except:
-            self.font = pygame.font.Font(None, 14)
-            self.big_font = pygame.font.Font(None, 20)
-            self.small_font = pygame.font.Font(None, 12)
+        self.font = get_font("text", 14)
+        self.big_font = get_font("text", 20)
+        self.small_font = get_font("text", 12)
         
         # 顏色
         self.colors = {
@@ -423,25 +441,25 @@ class TacticalBattleScene:
             "debuff": (255, 50, 50)
         }
         
-        # 載入精靈
+        # 載入精靈（只建索引，實際圖片在第一次使用時才載入）
         self.sprite_cache = {}
+        self.sprite_assets = get_asset_manager().handle("battle_grid")
+        self.sprite_index: Dict[str, tuple] = {}
+        self.sprite_stats = {"indexed": 0, "loaded": 0, "failed": 0}
         self._load_sprites()
     
     def _load_sprites(self):
-        """載入精靈圖像"""
+        """建立精靈索引：tileset 格子與 assets/characters 下的角色圖（一次目錄掃描）"""
         try:
             tileset_path = os.path.join("assets", "tileset_pixel.png")
             index_path = os.path.join("assets", "tileset_index_pixel.json")
             
             if os.path.exists(tileset_path) and os.path.exists(index_path):
-                tileset = pygame.image.load(tileset_path).convert_alpha()
                 with open(index_path, "r", encoding="utf-8") as f:
                     index = json.load(f)
                 
                 for name, (cx, cy) in index.items():
-                    rect = pygame.Rect(cx * 64, cy * 64, 64, 64)
-                    sprite = tileset.subsurface(rect).copy()
-                    self.sprite_cache[name] = pygame.transform.scale(sprite, (self.cell_size, self.cell_size))
+                    self.sprite_index[name] = (tileset_path, (cx * 64, cy * 64, 64, 64))
         except Exception as e:
             print(f"載入 tileset 失敗: {e}")
         
@@ -458,47 +476,47 @@ class TacticalBattleScene:
             except:
                 pass
         
-        # 載入角色圖片
-        if os.path.exists(characters_folder):
-            # 支援的屬性名稱
-            character_names = ["wind", "fire", "water", "earth", "wood", "shadow", 
-                             "light", "chaos", "metal", "mist", "dream", "law"]
-            
-            for char_name in character_names:
-                # 嘗試載入動畫幀（4幀）
-                for frame in range(4):
-                    # 動畫檔案名稱: wind_0.png, wind_1.png, ...
-                    anim_path = os.path.join(characters_folder, f"{char_name}_{frame}.png")
-                    if os.path.exists(anim_path):
-                        try:
-                            img = pygame.image.load(anim_path).convert_alpha()
-                            img = pygame.transform.scale(img, (self.cell_size, self.cell_size))
-                            cache_name = f"{char_name}_frame{frame}"
-                            self.sprite_cache[cache_name] = img
-                            print(f"✓ 載入動畫: {char_name} 第 {frame} 幀")
-                        except Exception as e:
-                            print(f"✗ 載入 {anim_path} 失敗: {e}")
-                
-                # 嘗試載入靜態圖片: wind.png
-                static_path = os.path.join(characters_folder, f"{char_name}.png")
-                if os.path.exists(static_path):
-                    try:
-                        img = pygame.image.load(static_path).convert_alpha()
-                        img = pygame.transform.scale(img, (self.cell_size, self.cell_size))
-                        # 如果有靜態圖，也作為所有幀使用
-                        for frame in range(4):
-                            cache_name = f"{char_name}_frame{frame}"
-                            if cache_name not in self.sprite_cache:
-                                self.sprite_cache[cache_name] = img
-                        print(f"✓ 載入靜態圖: {char_name}")
-                    except Exception as e:
-                        print(f"✗ 載入 {static_path} 失敗: {e}")
+        try:
+            files = {entry.name: entry.path for entry in os.scandir(characters_folder) if entry.is_file()}
+        except OSError:
+            files = {}
+        
+        for char_name in CHARACTER_ELEMENTS:
+            # 動畫幀: wind_0.png ~ wind_3.png；靜態圖 wind.png 補齊缺少的幀
+            static_path = files.get(f"{char_name}.png")
+            for frame in range(4):
+                path = files.get(f"{char_name}_{frame}.png") or static_path
+                if path:
+                    self.sprite_index[f"{char_name}_frame{frame}"] = (path, None)
+        
+        self.sprite_stats["indexed"] = len(self.sprite_index)
         
         # 動畫系統初始化
         self.animation_frames = {}
         self.animation_timer = 0.0
         self.animation_speed = 0.1  # 每幀時間（秒）
     
+    def _load_indexed_sprite(self, name: str) -> Optional[pygame.Surface]:
+        """第一次用到時才從索引載入並縮放"""
+        path, rect = self.sprite_index[name]
+        cell = (self.cell_size, self.cell_size)
+        if rect is None:
+            img = self.sprite_assets.load(path, cell, smooth=False)
+        else:
+            img = self.sprite_assets.load_region(path, rect, cell, smooth=False)
+        if img is None:
+            self.sprite_stats["failed"] += 1
+            del self.sprite_index[name]
+            return None
+        self.sprite_stats["loaded"] += 1
+        self.sprite_cache[name] = img
+        return img
+    
+    def release_assets(self):
+        """離開戰鬥時放掉已載入的精靈；索引保留，再進場時按需重新載入"""
+        self.sprite_cache.clear()
+        self.sprite_assets.release()
+    
     def get_character_sprite(self, char: Character, frame: int = 0) -> Optional[pygame.Surface]:
         """
         獲取角色精靈（自動支持動畫）
@@ -523,6 +541,10 @@ class TacticalBattleScene:
         for name in possible_names:
             if name in self.sprite_cache:
                 return self.sprite_cache[name]
+            if name in self.sprite_index:
+                img = self._load_indexed_sprite(name)
+                if img is not None:
+                    return img
         
         # 都找不到，返回 None（會繪製預設方塊）
         return None
@@ -1276,12 +1298,8 @@ class CharacterSelectScene:
         self.cursor = 0
         self.max_select = 5
         
-        try:
-            self.font = pygame.font.SysFont("Microsoft JhengHei", 18)
-            self.big_font = pygame.font.SysFont("Microsoft JhengHei", 24)
-        except:
-            self.font = pygame.font.Font(None, 18)
-            self.big_font = pygame.font.Font(None, 24)
+        self.font = get_font("text", 18)
+        self.big_font = get_font("text", 24)
         
         self.colors = {
             "bg": (20, 25, 35),
@@ -1,10 +1,11 @@
 from __future__ import annotations
 import pygame
-from core.ui import draw_text
+from core.ui import ListView, Menu
 from core.config import COLOR, WIDTH, HEIGHT, FPS
 from core.input_utils import NAV_UP, NAV_DOWN, CONFIRM, BACK, is_keydown, clear_after_action
 from core.dialogue import run_dialogue, run_lines
 from core.emotions import add_emotion
+from core.flags import ensure_flags
 
 TITLE = "教室 Classroom"
 OPTIONS = [
@@ -14,7 +15,7 @@ OPTIONS = [
 ]
 
 def _ensure_flags(state):
-    return state.setdefault("flags", {})
+    return ensure_flags(state)
 
 def build(assets, state=None):
     state = state or {}
@@ -36,29 +37,26 @@ def _maybe_play_intro(screen, state):
 def loop(screen, state, assets):
     _maybe_play_intro(screen, state)
     clock = pygame.time.Clock()
-    sel = int(state.get("classroom_sel", 0)) % len(OPTIONS)
+    options = ListView([label for label, *_ in OPTIONS], (48, 120), (760, 28),
+                       sel=int(state.get("classroom_sel", 0)), color=COLOR.get("text",(240,240,240)))
+    menu = Menu(options, bg=(16,18,22), texts=[
+        (TITLE, (48,48), COLOR.get("hint",(200,200,120))),
+        ("↑↓ 選擇 / Enter 互動 / Esc 返回", (48, HEIGHT-56), (180,180,180)),
+    ])
     running = True
     while running and state.get("current") == "classroom":
-        screen.fill((16,18,22))
-        draw_text(screen, TITLE, (48,48), color=COLOR.get("hint",(200,200,120)))
-        y0 = 120
-        for i,(label, did, emo, delta) in enumerate(OPTIONS):
-            y = y0 + i*36
-            if i == sel:
-                pygame.draw.rect(screen, (60,60,90), pygame.Rect(40, y-4, 760, 28))
-            draw_text(screen, label, (48, y), color=COLOR.get("text",(240,240,240)))
-        draw_text(screen, "↑↓ 選擇 / Enter 互動 / Esc 返回", (48, HEIGHT-56), color=(180,180,180))
-        pygame.display.flip()
+        menu.present(screen, state)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 state["current"]="exit"; running=False; break
-            if is_keydown(event, NAV_UP): sel = (sel - 1) % len(OPTIONS)
-            elif is_keydown(event, NAV_DOWN): sel = (sel + 1) % len(OPTIONS)
+            if is_keydown(event, NAV_UP): options.move(-1)
+            elif is_keydown(event, NAV_DOWN): options.move(1)
             elif is_keydown(event, BACK): state["current"]="world_map"; running=False; break
             elif is_keydown(event, CONFIRM):
-                label, did, emo, delta = OPTIONS[sel]
+                label, did, emo, delta = OPTIONS[options.sel]
                 if did: run_dialogue(screen, did, state=state)
                 if emo and delta: add_emotion(state, emo, delta)
+                menu.invalidate()
                 clear_after_action()
-        state["classroom_sel"] = sel
+        state["classroom_sel"] = options.sel
         clock.tick(FPS)
@@ -6,6 +6,7 @@ from core.config import COLOR, WIDTH, HEIGHT, FPS
 from core.affinity import get_value
 from core.emotions import ensure_emotions, get_emotion, add_emotion
 from core.dialogue import run_dialogue
+from core.flags import ensure_flags
 
 def build(assets, state):
     ensure_emotions(state)
@@ -15,7 +16,7 @@ def build(assets, state):
 def loop(screen, state, assets):
     clock = pygame.time.Clock()
     # 進場對話（只跑一次）
-    flags = state.setdefault("flags", {})
+    flags = ensure_flags(state)
     if not flags.get("dream_intro_done"):
         run_dialogue(screen, "dream_intro")
         flags["dream_intro_done"] = True
@@ -3,6 +3,7 @@
 from __future__ import annotations
 import pygame
 from core.dialogue import run_dialogue, run_lines
+from core.flags import ensure_flags
 
 try:
     from core.overlay_hook import end_day
@@ -23,6 +24,6 @@ def loop(screen, state, assets=None):
     except Exception:
         run_lines(screen,[{"speaker":"系統","text":"你回到家，長夜無語。"}],state=state)
     end_day(state)
-    state.setdefault("flags", {})["cinematic_chain_complete"] = True
+    ensure_flags(state)["cinematic_chain_complete"] = True
     state["area"]="home_room"
     state["current"]="roam"
@@ -2,12 +2,13 @@
 # Compatibility: assets argument is optional.
 from __future__ import annotations
 import pygame
+from core.flags import ensure_flags
 
 def build(assets=None, state=None):
     return {}
 
 def loop(screen, state, assets=None):
-    flags = state.setdefault("flags", {})
+    flags = ensure_flags(state)
     if flags.get("cinematic_chain_complete") or flags.get("ch3_done"):
         state.setdefault("area","home_room")
         state["current"] = "roam"
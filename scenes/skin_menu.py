@@ -38,7 +38,7 @@ def _coerce_loop_args(args: tuple, kwargs: dict):
         state = {}
     return screen, state, assets
 import pygame
-from core.ui import draw_text
+from core.ui import ListView, Menu
 from core.config import COLOR, WIDTH, HEIGHT, FPS
 from core.input_utils import NAV_UP, NAV_DOWN, CONFIRM, BACK, is_keydown, clear_after_action
 from core.skins import list_skins, get_current_skin, set_skin
@@ -58,28 +58,26 @@ def _loop(screen, state, assets):
     except Exception:
         cur_idx = 0
 
+    skins = ListView(items, (56, 120), (520, 28), pad=(12, 4), sel=cur_idx, bg=(18,18,24),
+                     highlight=(70,70,105), color=COLOR.get("text",(240,240,240)))
+    menu = Menu(skins, bg=(18,18,24), texts=[
+        ("換圖/風格 Skin", (56,56), COLOR.get("hint",(200,200,120))),
+        ("↑↓ 選擇 / Enter 套用 / Esc 返回", (56, HEIGHT-56), (180,180,180)),
+    ])
+
     running = True
     while running and state.get("current") == "skin_menu":
-        screen.fill((18,18,24))
-        draw_text(screen, "換圖/風格 Skin", (56,56), color=COLOR.get("hint",(200,200,120)))
-        y0 = 120
-        for i, name in enumerate(items):
-            y = y0 + i*36
-            if i == cur_idx:
-                pygame.draw.rect(screen, (70,70,105), pygame.Rect(44, y-4, 520, 28))
-            draw_text(screen, name, (56, y), color=COLOR.get("text",(240,240,240)))
-        draw_text(screen, "↑↓ 選擇 / Enter 套用 / Esc 返回", (56, HEIGHT-56), color=(180,180,180))
-        pygame.display.flip()
+        menu.present(screen, state)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 state["current"] = "exit"; running = False; break
-            if is_keydown(event, NAV_UP): cur_idx = (cur_idx - 1) % len(items)
-            elif is_keydown(event, NAV_DOWN): cur_idx = (cur_idx + 1) % len(items)
+            if is_keydown(event, NAV_UP): skins.move(-1)
+            elif is_keydown(event, NAV_DOWN): skins.move(1)
             elif is_keydown(event, BACK): state["current"] = "menu"; running = False; break
             elif is_keydown(event, CONFIRM):
-                set_skin(state, items[cur_idx])
-                push_note(state, f"已套用風格：{items[cur_idx]}")
+                set_skin(state, items[skins.sel])
+                push_note(state, f"已套用風格：{items[skins.sel]}")
                 clear_after_action()
         clock.tick(FPS)
 
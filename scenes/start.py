@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 # Compatibility: assets argument is optional.
 from __future__ import annotations
+import importlib
 import pygame
 from typing import Dict, Any, List
-from core.ui import draw_text
+from core.ui import ListView, Menu
 from core.config import COLOR, WIDTH, HEIGHT, FPS
-from core.save import save_state, load_state
+from core.save import load_latest, save_autosave
 from core.overlay_hook import push_note
 from core.storyflow import run_flow
+from core.flags import ensure_flags, FlagStore
 
 MENU: List[str] = ["繼續 Continue", "新遊戲 New Game", "離開 Exit"]
 
@@ -18,7 +20,7 @@ def _reset_state(state: Dict[str, Any], assets=None):
     state["calendar"] = {"week":1, "day":1}
     state["ap_max"] = 3
     state["ap"] = 3
-    state["flags"] = {}
+    state["flags"] = FlagStore()
     state["current"] = "start"
 
 def build(assets=None, state=None):
@@ -26,58 +28,81 @@ def build(assets=None, state=None):
     state.setdefault("start_sel", 0)
     return {}
 
+# 開場劇情串：第一章 → 第二章（前半）→ 觸火 → 第二章（後半）→ 第三章 → 回家過夜 → 自由探索
+# 目前播到第幾步記在 state["cinematic_step"]，中途關閉視窗時隨自動存檔寫出，「繼續」從同一步接著播。
+CINEMATIC_CHAIN = (
+    ("flow", "ch1_awaken_before"),
+    ("flow", "ch2_fire_shadow_part1"),
+    ("scene", "touch_fire_trial"),
+    ("flow", "ch2_fire_shadow_part2"),
+    ("flow", "ch3_first_match"),
+    ("scene", "home_return"),
+)
+
+def _quit_mid_chain(state):
+    # 在中斷點就寫自動存檔（不等重新送出的 QUIT 傳到主迴圈），存的場景是 start 而不是 exit
+    state["current"] = "start"
+    save_autosave(state)
+    state.pop("flow", None)   # 進度已在自動存檔裡，別讓宿主迴圈再續播一次
+    state["current"] = "exit"
+
 def _play_cinematic(screen, state):
-    # 第一章 → 第二章（前半）→ 觸火 → 第二章（後半）→ 第三章 → 回家過夜 → 自由探索
-    run_flow(screen, state, "ch1_awaken_before")
-    run_flow(screen, state, "ch2_fire_shadow_part1")
-    state["current"]="touch_fire_trial"
-    import scenes.touch_fire_trial as trial
-    trial.build(state.get("assets"), state)
-    trial.loop(screen, state, state.get("assets"))
-    run_flow(screen, state, "ch2_fire_shadow_part2")
-    run_flow(screen, state, "ch3_first_match")
-    state["current"]="home_return"
-    import scenes.home_return as hr
-    hr.build(state.get("assets"), state)
-    hr.loop(screen, state, state.get("assets"))
-    state.setdefault("flags", {})["cinematic_chain_complete"] = True
+    step = int(state.get("cinematic_step", 0))
+    while step < len(CINEMATIC_CHAIN):
+        kind, name = CINEMATIC_CHAIN[step]
+        state["cinematic_step"] = step
+        if kind == "flow":
+            # 視窗在劇情中被關閉：整串中止，state["flow"] 留著被中斷那段劇情的進度
+            if run_flow(screen, state, name, resume=True) == "QUIT":
+                _quit_mid_chain(state); return
+        else:
+            state["current"] = name
+            scene = importlib.import_module(f"scenes.{name}")
+            scene.build(state.get("assets"), state)
+            scene.loop(screen, state, state.get("assets"))
+            if state.get("current") == "exit":
+                _quit_mid_chain(state); return
+        step += 1
+    state.pop("cinematic_step", None)
+    ensure_flags(state)["cinematic_chain_complete"] = True
     state.setdefault("area","home_room")
     state["current"]="roam"
 
 def loop(screen, state, assets=None):
     assets = state.get("assets") if assets is None else assets
     clock = pygame.time.Clock()
-    sel = int(state.get("start_sel", 0)) % len(MENU)
+    options = ListView(MENU, (64, 180), (360, 30), step=40, pad=(8, 6), sel=int(state.get("start_sel", 0)),
+                       bg=(16, 18, 28), highlight=(60,80,120), color=COLOR.get("text",(240,240,240)))
+    menu = Menu(options, bg=(16, 18, 28), texts=[
+        ("校園異能 RPG", (64, 70), COLOR.get("hint",(200,200,160))),
+        ("↑↓ 選擇  Enter 確認", (64, 360), (180,180,180)),
+    ])
     running = True
     while running and state.get("current","start") == "start":
-        screen.fill((16, 18, 28))
-        draw_text(screen, "校園異能 RPG", (64, 70), color=COLOR.get("hint",(200,200,160)))
-        for i, label in enumerate(MENU):
-            y = 180 + i*40
-            if i == sel:
-                pygame.draw.rect(screen, (60,80,120), pygame.Rect(56, y-6, 360, 30))
-            draw_text(screen, label, (64, y), color=COLOR.get("text",(240,240,240)))
-        draw_text(screen, "↑↓ 選擇  Enter 確認", (64, 360), color=(180,180,180))
-        pygame.display.flip()
+        menu.present(screen, state)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 state["current"] = "exit"; running=False; break
             if event.type == pygame.KEYDOWN:
-                if event.key in (pygame.K_UP, pygame.K_w):
-                    sel = (sel - 1) % len(MENU)
-                elif event.key in (pygame.K_DOWN, pygame.K_s):
-                    sel = (sel + 1) % len(MENU)
+                if options.handle_nav(event):
+                    pass
                 elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_SPACE):
-                    label = MENU[sel]
+                    label = MENU[options.sel]
                     if label.startswith("繼續"):
-                        loaded = load_state(slot=0)
+                        loaded = load_latest(slot=0)
                         if loaded:
                             loaded["assets"] = assets
                             state.clear(); state.update(loaded)
+                            if "cinematic_step" in state:
+                                # 開場劇情串中途離開的存檔：從記錄的那一步接著播，播完才算完成
+                                push_note(state, "已讀取存檔")
+                                _play_cinematic(screen, state)
+                                return
+                            # 其餘存檔都是開場劇情串播完之後存的（含沒有旗標的舊存檔）
                             if not state.get("current"): state["current"]="roam"
                             if state.get("current")=="menu": state["current"]="roam"
-                            state.setdefault("flags", {})["cinematic_chain_complete"] = True
+                            ensure_flags(state)["cinematic_chain_complete"] = True
                             push_note(state, "已讀取存檔")
                             return
                         else:
@@ -88,5 +113,5 @@ def loop(screen, state, assets=None):
                         return
                     elif label.startswith("離開"):
                         state["current"] = "exit"; return
-        state["start_sel"] = sel
+        state["start_sel"] = options.sel
         clock.tick(FPS)
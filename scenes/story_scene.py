@@ -8,6 +8,10 @@ import os
 from enum import Enum
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
+from core.fonts import get_font
+from core.ui import layout_text
+from core.richtext import RichText, compile_markup, render_span
+from core.flags import ensure_flags
 
 try:
     from core.config import WIDTH, HEIGHT
@@ -55,6 +59,7 @@ class DialogNode:
     sound: str = ""
     auto_advance: float = 0.0
     condition: str = ""  # 顯示條件
+    rich: Optional[RichText] = None  # 編譯後的行內標記（載入時產生，text 隨之換成純文字）
 
 @dataclass
 class Chapter:
@@ -82,6 +87,11 @@ class StoryManager:
         self.waiting_for_input = False
         self.choice_cursor = 0
         
+        # 目前節點的換行結果與已完成行的 Surface（進入節點時計算一次）
+        self.text_lines: tuple = ()         # ((起, 迄), ...) 對應 current_node.text 的切片
+        self.line_surfaces: Dict[int, pygame.Surface] = {}
+        self.partial_line = None            # (行號, 字數, Surface)：打字中的最後一行
+        
         # 特效
         self.effect_timer = 0.0
         self.shake_intensity = 0
@@ -90,14 +100,9 @@ class StoryManager:
         self.fade_alpha = 0
         
         # 字體
-        try:
-            self.font = pygame.font.SysFont("Microsoft JhengHei", 18)
-            self.big_font = pygame.font.SysFont("Microsoft JhengHei", 24)
-            self.title_font = pygame.font.SysFont("Microsoft JhengHei", 32)
-        except:
-            self.font = pygame.font.Font(None, 18)
-            self.big_font = pygame.font.Font(None, 24)
-            self.title_font = pygame.font.Font(None, 32)
+        self.font = get_font("text", 18)
+        self.big_font = get_font("text", 24)
+        self.title_font = get_font("text", 32)
         
         # 顏色
         self.colors = {
@@ -128,6 +133,12 @@ class StoryManager:
         # 第三章：第一場比試
         chapter3 = self._create_chapter3()
         self.chapters[chapter3.id] = chapter3
+        
+        # 編譯行內標記（顏色 / 強調 / 停頓 / 打字速度）
+        for chapter in self.chapters.values():
+            for node in chapter.nodes.values():
+                node.rich = compile_markup(node.text)
+                node.text = node.rich.plain
     
     def _create_chapter1(self) -> Chapter:
         """第一章：覺醒之前"""
@@ -656,6 +667,29 @@ class StoryManager:
         self.text_timer = 0.0
         self.waiting_for_input = False
         self.choice_cursor = 0
+        if self.current_node and self.current_node.rich is None:
+            self.current_node.rich = compile_markup(self.current_node.text)
+            self.current_node.text = self.current_node.rich.plain
+        # 寬度同 _draw_dialog_box 的文字區（對話框寬 - 左右留白）
+        self.text_lines = layout_text(self.current_node.text, self.font, (WIDTH - 40) - 60) if self.current_node else ()
+        self.line_surfaces = {}
+        self.partial_line = None
+    
+    def _line_surface(self, index: int, color) -> Optional[pygame.Surface]:
+        """第 index 行目前應顯示的 Surface：已打完的行快取，打字中的行只在字數變動時重畫"""
+        start, end = self.text_lines[index]
+        shown = min(self.current_char, end) - start
+        if shown <= 0:
+            return None
+        if shown == end - start:
+            surf = self.line_surfaces.get(index)
+            if surf is None:
+                surf = self.line_surfaces[index] = render_span(self.font, self.current_node.rich, start, end, color)
+            return surf
+        if self.partial_line is None or self.partial_line[:2] != (index, shown):
+            surf = render_span(self.font, self.current_node.rich, start, start + shown, color)
+            self.partial_line = (index, shown, surf)
+        return self.partial_line[2]
     
     def handle_input(self, keys_just_pressed):
         """處理輸入"""
@@ -717,7 +751,7 @@ class StoryManager:
         # 更新文字顯示
         if self.current_char < len(self.current_node.text):
             self.text_timer += dt
-            chars_to_show = int(self.text_timer * self.text_speed)
+            chars_to_show = self.current_node.rich.chars_at(self.text_timer, self.text_speed)
             self.current_char = min(chars_to_show, len(self.current_node.text))
         
         # 自動前進
@@ -824,34 +858,13 @@ class StoryManager:
             name_text = self.big_font.render(self.current_node.speaker, True, self.colors["text"])
             surface.blit(name_text, (name_bg.x + 10, name_bg.y + 5))
         
-        # 對話文字
-        displayed_text = self.current_node.text[:self.current_char]
+        # 對話文字（換行已在進入節點時算好）
         text_color = self._get_text_color()
-        
-        # 文字換行
-        words = displayed_text
-        max_width = box_rect.width - 60
-        lines = []
-        current_line = ""
-        
-        for char in words:
-            test_line = current_line + char
-            text_width = self.font.size(test_line)[0]
-            
-            if text_width <= max_width:
-                current_line = test_line
-            else:
-                if current_line:
-                    lines.append(current_line)
-                current_line = char
-        
-        if current_line:
-            lines.append(current_line)
-        
-        # 繪製文字
         text_y = box_rect.y + 20
-        for line in lines[:6]:  # 最多6行
-            text_surf = self.font.render(line, True, text_color)
+        for i in range(min(len(self.text_lines), 6)):  # 最多6行
+            text_surf = self._line_surface(i, text_color)
+            if text_surf is None:
+                break
             surface.blit(text_surf, (box_rect.x + 30, text_y))
             text_y += 28
         
@@ -976,9 +989,9 @@ if __name__ == "__main__":
     pygame.display.set_caption("劇情測試")
     clock = pygame.time.Clock()
     # 一次性播放開場故事（使用 state flag 避免重複）
-    if not state.get('flags', {}).get('opening_story_done'):
+    if not ensure_flags(state).get('opening_story_done'):
         _play_opening_story(screen, assets, state)
-        state.setdefault('flags', {})['opening_story_done'] = True
+        ensure_flags(state)['opening_story_done'] = True
     
     story = StoryManager(None)
     story.start_chapter("chapter1")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import pygame
 from core.ui import draw_text
+from core.flags import ensure_flags
 
 # 不依賴 core.config，直接從畫面讀尺寸，避免解析度不一致導致元素跑出畫面
 SPEED = 4
@@ -69,5 +70,5 @@ def loop(screen, state, assets=None):
 
     if touched:
         add_affinity(state,"火",1)
-        state.setdefault("flags",{})["borrowed_fire_done"]=True
+        ensure_flags(state)["borrowed_fire_done"]=True
         push_note(state,"你『借了火』，首次凝聚成功。")
@@ -2,12 +2,13 @@
 # Legacy scene redirect stub.
 # 任何進入舊場景（世界地圖/校園/心靈中樞/舊選單），一律改導向到新版流程。
 from __future__ import annotations
+from core.flags import ensure_flags
 
 def build(assets=None, state=None):
     return {}
 
 def loop(screen, state, assets=None):
-    flags = state.setdefault("flags", {})
+    flags = ensure_flags(state)
     # 已跑完三章或有結束旗標 ⇒ 直接進自由探索
     if flags.get("cinematic_chain_complete") or flags.get("ch3_done"):
         state.setdefault("area", "home_room")